@@ -0,0 +1,94 @@
+"""Download profiles, playlists and videos without a display.
+
+    python download.py URL [URL ...] -o FOLDER [--limit N] [--single] [--workers N]
+                       [--per-host N] [--retries N] [--format F | --mp3] [--cookies FILE]
+    python download.py --resume
+
+Each URL is one job (see service.py): a TikTok/YouTube/SnackVideo profile or
+playlist is listed once and its new videos are downloaded on a shared worker
+pool; a video URL downloads that video. Videos already in the folder's
+.download_archive.txt are skipped, so running the same command again only
+fetches what was added since.
+
+Jobs are kept in a queue file (jobstore.py; --queue, default
+~/.cache/downloader/download.db) until they finish. After a crash or Ctrl-C,
+--resume carries on with the videos that were left, without listing the
+profiles again; URLs given alongside --resume are queued after them.
+
+Every event is written to stdout as one JSON object per line; progress events
+only with --progress. Exit status is 1 if a video or a listing failed or the
+run was stopped, 2 for bad arguments.
+"""
+import argparse, json, signal, sys, threading
+
+from jobstore import JobStore, queue_path
+from service import (DEFAULT_PER_HOST, DEFAULT_RETRIES, DEFAULT_WORKERS, MP3_OPTIONS, DownloadJob,
+                     DownloadService)
+
+def emit(record: dict, lock=threading.Lock()):
+    with lock:
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Download videos, profiles and playlists, without a display.")
+    ap.add_argument("urls", nargs="*", metavar="URL", help="profile, playlist or video link")
+    ap.add_argument("-o", "--output", help="download folder")
+    ap.add_argument("--limit", type=int, default=0, help="only the first N videos of each profile (default: all)")
+    ap.add_argument("--single", action="store_true", help="download each URL as one video, without listing it")
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="videos downloaded at once")
+    ap.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST, help="downloads from one host at once")
+    ap.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="extra attempts for a failed video")
+    ap.add_argument("--outtmpl", default="%(uploader)s_%(id)s.%(ext)s", help="yt-dlp file name template")
+    ap.add_argument("--format", help="yt-dlp format selector, e.g. 'bv*+ba/b'")
+    ap.add_argument("--mp3", action="store_true", help="extract the audio as mp3")
+    ap.add_argument("--cookies", help="cookies.txt exported from a browser")
+    ap.add_argument("--no-archive", action="store_true", help="neither skip nor record archived videos")
+    ap.add_argument("--progress", action="store_true", help="also stream download progress events")
+    ap.add_argument("--queue", default=queue_path("download"), help="queue file jobs are kept in until they finish")
+    ap.add_argument("--resume", action="store_true", help="first finish the jobs an earlier run left in the queue")
+    args = ap.parse_args(argv)
+    if not args.urls and not args.resume:
+        ap.error("give at least one URL, or --resume")
+    if args.urls and not args.output:
+        ap.error("-o/--output is required with URLs")
+
+    options = {"merge_output_format": "mp4"}
+    if args.mp3:
+        options = dict(MP3_OPTIONS)
+    elif args.format:
+        options["format"] = args.format
+    if args.cookies:
+        options["cookiefile"] = args.cookies
+
+    failed = []
+
+    def on_event(event):
+        if event["event"] == "finished" and (event["failed"] or event["stopped"]):
+            failed.append(event["job"])
+        if event["event"] != "progress" or args.progress:
+            emit(event)
+
+    try:
+        jobs = [DownloadJob(url, args.output, limit=args.limit, single=args.single, archive=not args.no_archive,
+                            outtmpl=args.outtmpl, options=options) for url in args.urls]
+        service = DownloadService(args.workers, args.per_host, args.retries, on_event=on_event,
+                                  store=JobStore(args.queue))
+    except (OSError, ValueError) as e:
+        emit({"event": "error", "error": str(e)})
+        return 2
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: service.cancel())
+    if args.resume:
+        service.resume()
+    for job in jobs:
+        service.submit(job)
+    # Waiting in short steps keeps the main thread free to run the signal handler
+    while not service.wait(timeout=0.5):
+        pass
+    service.shutdown()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Durable download queue, so a crash or a closed window doesn't lose queued work.
+
+A JobStore is one SQLite file (QUEUE_DIR/<tool>.db by default; QUEUE_DIR is
+$DOWNLOADER_STATE or ~/.cache/downloader). It holds every unfinished job as
+submitted, and once the job has been listed, its videos in listing order with
+their resolved URLs, archive keys and state:
+
+  pending   not started yet, or stopped part-way (picked up again on resume)
+  active    downloading; left over after a crash it counts as pending
+  done      saved, with its file name
+  failed    gave up after the retries
+
+Byte offsets (downloaded / total) are written with the progress events. The
+bytes themselves stay in yt-dlp's .part files, which continuedl resumes from.
+
+DownloadService.resume() re-queues what is left: listed jobs go straight to
+their remaining videos without listing the profile again. A job is deleted
+once it finishes, or when it is cancelled with drop=True.
+"""
+import json, os, sqlite3, threading, time
+
+QUEUE_DIR = os.environ.get(
+    "DOWNLOADER_STATE", os.path.join(os.path.expanduser("~"), ".cache", "downloader")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id      INTEGER PRIMARY KEY,
+    spec    TEXT NOT NULL,     -- the DownloadJob's fields as JSON
+    state   TEXT NOT NULL,     -- listing | listed
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    job        INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    seq        INTEGER NOT NULL,   -- position in the listing
+    url        TEXT NOT NULL,
+    key        TEXT,
+    state      TEXT NOT NULL,      -- pending | active | done | failed
+    filename   TEXT,
+    downloaded INTEGER NOT NULL DEFAULT 0,
+    total      INTEGER,
+    PRIMARY KEY (job, seq)
+);
+"""
+
+def queue_path(name: str) -> str:
+    return os.path.join(QUEUE_DIR, f"{name}.db")
+
+class JobStore:
+    """Thread-safe: the download workers all write through one connection."""
+
+    def __init__(self, path: str = ":memory:"):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        # Autocommit, so every state change is on disk before the download moves on
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.executescript(SCHEMA)
+
+    def _run(self, sql: str, args=()):
+        with self._lock:
+            return self._db.execute(sql, args).fetchall()
+
+    def add_job(self, spec: dict) -> int:
+        with self._lock:
+            cur = self._db.execute("INSERT INTO jobs (spec, state, created) VALUES (?, 'listing', ?)",
+                                   (json.dumps(spec, ensure_ascii=False), time.time()))
+            return cur.lastrowid
+
+    def set_items(self, job_id: int, entries):
+        """Record a job's listing (Entry tuples, in order); from here on a resume doesn't list it again."""
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO items (job, seq, url, key, state) VALUES (?, ?, ?, ?, 'pending')",
+                                 [(job_id, seq, e.url, e.key) for seq, e in enumerate(entries)])
+            self._db.execute("UPDATE jobs SET state = 'listed' WHERE id = ?", (job_id,))
+
+    def set_state(self, job_id: int, seq: int, state: str, filename: str = None):
+        self._run("UPDATE items SET state = ?, filename = COALESCE(?, filename) WHERE job = ? AND seq = ?",
+                  (state, filename, job_id, seq))
+
+    def set_progress(self, job_id: int, seq: int, downloaded: int, total: int):
+        self._run("UPDATE items SET downloaded = ?, total = ? WHERE job = ? AND seq = ?",
+                  (downloaded or 0, total, job_id, seq))
+
+    def forget(self, job_id: int):
+        self._run("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def unfinished(self) -> list:
+        """(id, spec, state) of every job still in the queue, oldest first."""
+        return [(job_id, json.loads(spec), state)
+                for job_id, spec, state in self._run("SELECT id, spec, state FROM jobs ORDER BY id")]
+
+    def remaining(self, job_id: int) -> list:
+        """(seq, url, key) of the job's videos that aren't done or failed, in listing order."""
+        return self._run("SELECT seq, url, key FROM items WHERE job = ? AND state IN ('pending', 'active') "
+                         "ORDER BY seq", (job_id,))
+
+    def counts(self, job_id: int) -> dict:
+        return dict(self._run("SELECT state, COUNT(*) FROM items WHERE job = ? GROUP BY state", (job_id,)))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
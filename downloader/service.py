@@ -0,0 +1,435 @@
+"""Headless download service shared by the downloader GUIs (tiktokD, youtube, snackV).
+
+A DownloadJob says what to fetch into which folder: a profile or playlist (all
+of it, or its first `limit` videos), a single video, or, with single=True, a
+URL that is downloaded as it is. DownloadService runs jobs with no Tk at all:
+
+  - a profile is listed once, flat, so each video is only extracted when it
+    downloads; SnackVideo profiles, which yt-dlp can't list, are scraped
+  - videos already in the folder's archive (.download_archive.txt, one
+    "<extractor> <id>" line per video like yt-dlp's) are dropped before any
+    per-video request, and every new download is added to it
+  - the rest go to one worker pool shared by all jobs, at most `per_host` at a
+    time from one host; a failed video is retried `retries` times with backoff
+  - jobs, their listings and each video's state are kept in a JobStore (see
+    jobstore.py); resume() picks up what a crash or a closed window left
+
+What happens is reported to the listeners as event dicts, each with "event" and
+"job" (the id submit() returned):
+
+  queued     url, folder, resumed (picked up from the store by resume())
+  listed     total (videos to download), known (skipped, already in the archive)
+  progress   url, downloaded_bytes, total_bytes, speed, eta (a few times a second)
+  retry      url, attempt, error
+  done       url, filename
+  error      error, plus url when one video failed rather than the listing
+  finished   completed, failed, cancelled (videos), stopped (cancel() was called)
+
+Listeners are called from worker threads. describe() turns an event into the
+log line the GUIs show; download.py is the command-line client.
+
+The GUIs are run as plain scripts from their own folders, without installing
+anything, so this folder is not on their import path. Each tool folder
+therefore has a shared_downloader.py that adds ../downloader to sys.path and
+re-exports what the GUIs use; the copies are identical and change together.
+"""
+import itertools, os, queue, re, threading, time
+from dataclasses import asdict, dataclass, field
+from typing import NamedTuple
+from urllib.parse import urlparse
+
+import yt_dlp
+from yt_dlp.utils import DownloadCancelled
+
+from jobstore import JobStore
+
+ARCHIVE_NAME = ".download_archive.txt"
+DEFAULT_WORKERS = 4    # videos downloaded at once, over all jobs
+DEFAULT_PER_HOST = 4   # politeness cap: at most this many downloads from one host at a time
+DEFAULT_RETRIES = 2    # extra attempts for a video that failed
+RETRY_DELAY = 2.0      # seconds before the first retry, doubled for each one after
+PROGRESS_INTERVAL = 0.5
+
+# yt-dlp options every download starts from; a job's own options override them
+BASE_OPTIONS = {
+    "quiet": True,
+    "no_warnings": True,
+    "continuedl": True,
+    "retries": 5,
+    "fragment_retries": 5,
+}
+MP3_OPTIONS = {
+    "format": "bestaudio/best",
+    "postprocessors": [{"key": "FFmpegExtractAudio", "preferredcodec": "mp3", "preferredquality": "192"}],
+}
+
+SNACK_PROFILE = re.compile(r"(https?://)?(www\.)?snackvideo\.com/@[^/?#]+/?(\?.*)?$", re.I)
+SNACK_VIDEO = re.compile(r"https://www\.snackvideo\.com/@[A-Za-z0-9._-]+/video/(\d+)")
+
+@dataclass
+class DownloadJob:
+    url: str
+    folder: str
+    limit: int = 0          # profiles: only the first `limit` videos (0 = all)
+    single: bool = False    # download url as one video, without listing it or checking the archive
+    archive: bool = True    # skip videos in the folder's archive and record new ones
+    outtmpl: str = "%(uploader)s_%(id)s.%(ext)s"
+    options: dict = field(default_factory=dict)  # extra yt-dlp options: format, cookiefile, postprocessors…
+
+    def __post_init__(self):
+        if not self.url:
+            raise ValueError("No URL to download.")
+        if not self.folder:
+            raise ValueError("No download folder.")
+        if self.limit < 0:
+            raise ValueError("limit can't be negative")
+
+class Entry(NamedTuple):
+    url: str
+    key: str = None    # archive key, when the listing tells
+    info: dict = None  # already extracted (a single video from listing), downloaded without a second request
+
+def archive_key(info: dict):
+    ie = info.get("ie_key") or info.get("extractor_key")
+    return f"{ie.lower()} {info['id']}" if ie and info.get("id") else None
+
+def ydl_options(job: DownloadJob) -> dict:
+    return {**BASE_OPTIONS, "outtmpl": os.path.join(job.folder, job.outtmpl), **job.options}
+
+def snackvideo_entries(profile_url: str) -> list:
+    """Video links on a SnackVideo profile page, in page order."""
+    import requests
+
+    r = requests.get(profile_url, headers={"User-Agent": "Mozilla/5.0"}, timeout=30)
+    r.raise_for_status()
+    links = dict.fromkeys(m.group(0) for m in SNACK_VIDEO.finditer(r.text))
+    return [Entry(link, f"snackvideo {SNACK_VIDEO.match(link).group(1)}") for link in links]
+
+def list_entries(job: DownloadJob) -> list:
+    """The videos a job downloads: a profile or playlist listed flat, or the one video its URL points at."""
+    if job.single:
+        return [Entry(job.url)]
+    if SNACK_PROFILE.match(job.url):
+        entries = snackvideo_entries(job.url)
+    else:
+        opts = {**ydl_options(job), "extract_flat": "in_playlist"}
+        if job.limit:
+            opts["playlistend"] = job.limit
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            info = ydl.extract_info(job.url, download=False) or {}
+        if "entries" not in info:
+            return [Entry(info.get("webpage_url") or job.url, archive_key(info), info)]
+        entries = [Entry(e["url"], archive_key(e)) for e in info["entries"] if e and e.get("url")]
+    return entries[:job.limit] if job.limit else entries
+
+class Archive:
+    """A folder's download archive, read once and shared by every job saving there."""
+
+    def __init__(self, folder: str):
+        self.path = os.path.join(folder, ARCHIVE_NAME)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._keys = {line.strip() for line in f if line.strip()}
+        except OSError:
+            self._keys = set()
+
+    def __contains__(self, key) -> bool:
+        return key in self._keys
+
+    def add(self, key: str):
+        with self._lock:
+            if key in self._keys:
+                return
+            self._keys.add(key)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(key + "\n")
+
+class _Workers:
+    """A fixed set of daemon threads running queued calls in order.
+
+    Unlike ThreadPoolExecutor, whose threads are joined at exit, these never
+    keep the process alive: a closed window mustn't wait for a listing or a
+    postprocessor to end. What they were doing is still in the JobStore.
+    """
+
+    def __init__(self, count: int, name: str):
+        self._tasks = queue.SimpleQueue()
+        self._threads = [threading.Thread(target=self._work, name=f"{name}_{i}", daemon=True) for i in range(count)]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, fn, *args):
+        self._tasks.put((fn, args))
+
+    def _work(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            fn, args = task
+            try:
+                fn(*args)
+            except Exception:  # _list and _fetch report their own failures as events
+                pass
+
+    def shutdown(self, wait: bool = True):
+        for _ in self._threads:
+            self._tasks.put(None)
+        if wait:
+            for t in self._threads:
+                t.join()
+
+class _Run:
+    """A submitted job's state: how many of its videos are still queued or downloading, and the outcome counts."""
+
+    def __init__(self, job: DownloadJob):
+        self.job = job
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.drop = False  # forget the job rather than keep it for resume()
+        self.counts = {"completed": 0, "failed": 0, "cancelled": 0}
+
+class DownloadService:
+    def __init__(self, workers: int = DEFAULT_WORKERS, per_host: int = DEFAULT_PER_HOST,
+                 retries: int = DEFAULT_RETRIES, on_event=None, store: JobStore = None):
+        if workers <= 0 or per_host <= 0 or retries < 0:
+            raise ValueError("workers and per_host must be positive, retries can't be negative")
+        self.workers = workers
+        self.per_host = per_host
+        self.retries = retries
+        self._listeners = [on_event] if on_event else []
+        self._pool = _Workers(workers, "download")
+        self.store = store or JobStore()  # in memory unless a tool passes its queue file
+        self._runs = {}
+        self._archives = {}
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def submit(self, job: DownloadJob) -> int:
+        """Queue a job; returns its id. The job is listed, then its videos downloaded, on the worker pool."""
+        rid = self.store.add_job(asdict(job))
+        with self._lock:
+            self._runs[rid] = _Run(job)
+        self._emit(rid, "queued", url=job.url, folder=job.folder, resumed=False)
+        self._pool.submit(self._list, rid)
+        return rid
+
+    def resume(self) -> list:
+        """Queue the jobs the store still holds from an earlier run; returns their ids.
+
+        A job that was listed continues with its pending and interrupted videos
+        (partial files resume from where they stopped); one that wasn't is listed now.
+        """
+        resumed = []
+        for rid, spec, state in self.store.unfinished():
+            with self._lock:
+                if rid in self._runs:
+                    continue
+                try:
+                    run = self._runs[rid] = _Run(DownloadJob(**spec))
+                except (TypeError, ValueError):  # written by an incompatible version
+                    self.store.forget(rid)
+                    continue
+            resumed.append(rid)
+            self._emit(rid, "queued", url=run.job.url, folder=run.job.folder, resumed=True)
+            if state == "listing":
+                self._pool.submit(self._list, rid)
+                continue
+            items = self.store.remaining(rid)
+            self._emit(rid, "listed", total=len(items), known=self.store.counts(rid).get("done", 0))
+            if not items:
+                self._finish(rid)
+                continue
+            run.pending = len(items)
+            for seq, url, key in items:
+                self._pool.submit(self._fetch, rid, seq, Entry(url, key))
+        return resumed
+
+    def cancel(self, job_id: int = None, drop: bool = False):
+        """Stop one job, or every job: downloads in flight are aborted and queued ones never start.
+
+        The jobs stay in the store for resume(), unless drop is set.
+        """
+        with self._lock:
+            runs = [self._runs[job_id]] if job_id is not None else list(self._runs.values())
+        for run in runs:
+            run.drop = run.drop or drop
+            run.cancelled.set()
+
+    def wait(self, job_id: int = None, timeout: float = None) -> bool:
+        """Block until the job (or every job submitted so far) has finished; False on timeout."""
+        with self._lock:
+            runs = [self._runs[job_id]] if job_id is not None else list(self._runs.values())
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for run in runs:
+            left = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not run.done.wait(left):
+                return False
+        return True
+
+    def shutdown(self, cancel: bool = False, wait: bool = True):
+        """Stop the workers once the jobs have finished (cancel: stop them first).
+
+        Without wait it returns at once; downloads still running are cut off
+        when the process exits and stay in the store for resume().
+        """
+        if cancel:
+            self.cancel()
+        if wait:
+            self.wait()
+        self._pool.shutdown(wait=wait)
+
+    # --- workers ---
+    def _emit(self, rid: int, event: str, **fields):
+        record = {"event": event, "job": rid, **fields}
+        for listener in list(self._listeners):
+            try:
+                listener(record)
+            except Exception:  # e.g. a GUI whose window is already closed; the download itself goes on
+                pass
+
+    def _archive(self, folder: str) -> Archive:
+        folder = os.path.abspath(folder)
+        with self._lock:
+            if folder not in self._archives:
+                self._archives[folder] = Archive(folder)
+            return self._archives[folder]
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            return self._hosts.setdefault(host, threading.BoundedSemaphore(self.per_host))
+
+    def _list(self, rid: int):
+        run = self._runs[rid]
+        job = run.job
+        try:
+            os.makedirs(job.folder, exist_ok=True)
+            entries = [] if run.cancelled.is_set() else list_entries(job)
+        except Exception as e:
+            run.counts["failed"] += 1
+            self._emit(rid, "error", error=str(e))
+            return self._finish(rid)
+        if run.cancelled.is_set():
+            return self._finish(rid)
+
+        archive = self._archive(job.folder) if job.archive else ()
+        new = [e for e in entries if not (e.key and e.key in archive)]
+        self.store.set_items(rid, new)
+        self._emit(rid, "listed", total=len(new), known=len(entries) - len(new))
+        if not new:
+            return self._finish(rid)
+        run.pending = len(new)
+        for seq, entry in enumerate(new):
+            self._pool.submit(self._fetch, rid, seq, entry)
+
+    def _fetch(self, rid: int, seq: int, entry: Entry):
+        run = self._runs[rid]
+        outcome = "cancelled"
+        try:
+            slot = self._host_slot(entry.url)
+            for attempt in itertools.count(1):
+                # The host slot is only held while downloading, so another video can use it during the backoff
+                with slot:
+                    if run.cancelled.is_set():
+                        raise DownloadCancelled("Stopped")
+                    self.store.set_state(rid, seq, "active")
+                    try:
+                        info, filename = self._download(rid, seq, entry)
+                        break
+                    except DownloadCancelled:
+                        raise
+                    except Exception as e:
+                        if attempt > self.retries:
+                            raise
+                        self._emit(rid, "retry", url=entry.url, attempt=attempt, error=str(e))
+                # A retry extracts the video again rather than reusing the listing's info
+                entry = entry._replace(info=None)
+                if run.cancelled.wait(RETRY_DELAY * 2 ** (attempt - 1)):
+                    raise DownloadCancelled("Stopped")
+            key = entry.key or archive_key(info)
+            if run.job.archive and key:
+                self._archive(run.job.folder).add(key)
+            outcome = "completed"
+            self.store.set_state(rid, seq, "done", filename)
+            self._emit(rid, "done", url=entry.url, filename=filename)
+        except DownloadCancelled:
+            self.store.set_state(rid, seq, "pending")
+        except Exception as e:
+            outcome = "failed"
+            self.store.set_state(rid, seq, "failed")
+            self._emit(rid, "error", url=entry.url, error=str(e))
+        finally:
+            with run.lock:
+                run.counts[outcome] += 1
+                run.pending -= 1
+                last = run.pending == 0
+            if last:
+                self._finish(rid)
+
+    def _download(self, rid: int, seq: int, entry: Entry):
+        run = self._runs[rid]
+        shown = [0.0]
+
+        def hook(d):
+            if run.cancelled.is_set():
+                raise DownloadCancelled("Stopped")
+            now = time.monotonic()
+            if d.get("status") == "downloading" and now - shown[0] >= PROGRESS_INTERVAL:
+                shown[0] = now
+                total = d.get("total_bytes") or d.get("total_bytes_estimate")
+                self.store.set_progress(rid, seq, d.get("downloaded_bytes"), total)
+                self._emit(rid, "progress", url=entry.url, downloaded_bytes=d.get("downloaded_bytes"),
+                           total_bytes=total, speed=d.get("speed"), eta=d.get("eta"))
+
+        opts = {**ydl_options(run.job), "noplaylist": True, "progress_hooks": [hook]}
+        # YoutubeDL isn't thread-safe: one per download
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            if entry.info:
+                info = ydl.process_ie_result(entry.info, download=True) or {}
+            else:
+                info = ydl.extract_info(entry.url, download=True) or {}
+            downloads = info.get("requested_downloads") or [{}]
+            filename = downloads[0].get("filepath") or ydl.prepare_filename(info)
+        return info, filename
+
+    def _finish(self, rid: int):
+        run = self._runs[rid]
+        stopped = run.cancelled.is_set()
+        if run.drop or not stopped:
+            self.store.forget(rid)
+        self._emit(rid, "finished", **run.counts, stopped=stopped)
+        run.done.set()
+
+def describe(event: dict):
+    """The log line for an event, or None for events the GUIs don't log (progress)."""
+    kind = event["event"]
+    if kind == "queued":
+        return f"↩️ Resuming {event['url']}" if event.get("resumed") else f"🔗 {event['url']}"
+    if kind == "listed":
+        total, known = event["total"], event["known"]
+        if not total and not known:
+            return "⚠️ No videos found."
+        lines = [f"⏭️ {known} video(s) already downloaded."] if known else []
+        lines.append(f"Found {total} video(s). Starting download…" if total else "✅ Nothing new.")
+        return "\n".join(lines)
+    if kind == "retry":
+        return f"🔁 Retry {event['attempt']}: {event['url']}: {event['error']}"
+    if kind == "done":
+        return f"⬇️ Saved: {os.path.basename(event['filename'])}"
+    if kind == "error":
+        line = f"❌ Error: {event['url']}: {event['error']}" if "url" in event else f"❌ Error: {event['error']}"
+        if "403" in event["error"] or "Unable to extract webpage" in event["error"]:
+            line += "\n💡 HINT: The site refused the request; a cookies.txt exported from your browser usually helps."
+        return line
+    if kind == "finished":
+        if event["stopped"]:
+            return "⛔ Stopped."
+        return f"⚠️ Finished, {event['failed']} failed." if event["failed"] else "✅ All done."
+    return None
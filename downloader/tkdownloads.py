@@ -0,0 +1,104 @@
+"""DownloadService for a Tk window: the downloader GUIs' side of service.py.
+
+Listeners are called on download threads and Tk is not thread-safe, so events
+are put on a queue that the window drains every POLL_MS on the UI thread.
+From there TkDownloads keeps the usual widgets up to date:
+
+  log        called with describe()'s line for every event that has one
+  progress   a ttk.Progressbar: one step per saved or failed video of the last listing
+  completed  a Label showing "Completed [n]"
+  button     the Download button, disabled while any job is queued or downloading
+  on_event   called with every event after that, for anything a tool adds
+
+Jobs live in the tool's JobStore (QUEUE_DIR/<tool>.db). Whatever a crash or a
+closed window interrupted is resumed as soon as the window is up, without
+listing the profiles again; closing the window stops the downloads and leaves
+them queued for next time. It closes at once: the service's threads are
+daemons, so a listing or postprocessor still running doesn't hold the process.
+"""
+import queue
+
+from jobstore import JobStore, queue_path
+from service import DEFAULT_PER_HOST, DEFAULT_WORKERS, DownloadService, describe
+
+POLL_MS = 100
+
+class TkDownloads:
+    def __init__(self, root, tool: str, log, progress=None, completed=None, button=None, on_event=None,
+                 workers: int = DEFAULT_WORKERS, per_host: int = DEFAULT_PER_HOST):
+        self.root = root
+        self.store = JobStore(queue_path(tool))
+        self._log = log
+        self._progress = progress
+        self._completed_lbl = completed
+        self._button = button
+        self._on_event = on_event
+        self._events = queue.SimpleQueue()
+        self.completed = 0
+        self.running = 0  # jobs queued or downloading
+        self.service = self._make_service(workers, per_host)
+        root.protocol("WM_DELETE_WINDOW", self.close)
+        self._after = root.after(POLL_MS, self._poll)
+        self.service.resume()
+
+    def _make_service(self, workers: int, per_host: int) -> DownloadService:
+        return DownloadService(workers, per_host, on_event=self._events.put, store=self.store)
+
+    def configure(self, workers: int, per_host: int):
+        """Use a pool of this size from the next submit(); only call it while nothing is running."""
+        if (workers, per_host) != (self.service.workers, self.service.per_host):
+            self.service.shutdown()
+            self.service = self._make_service(workers, per_host)
+
+    def submit(self, job) -> int:
+        return self.service.submit(job)
+
+    def stop(self):
+        """Stop every download and forget the jobs (Stop button)."""
+        self.service.cancel(drop=True)
+
+    def reset(self):
+        self.completed = 0
+        if self._completed_lbl is not None:
+            self._completed_lbl.config(text="Completed [0]")
+        if self._progress is not None:
+            self._progress["value"] = 0
+
+    def close(self):
+        self.service.shutdown(cancel=True, wait=False)
+        self.root.after_cancel(self._after)
+        self.root.destroy()
+
+    def _poll(self):
+        while True:
+            try:
+                ev = self._events.get_nowait()
+            except queue.Empty:
+                break
+            self._dispatch(ev)
+        self._after = self.root.after(POLL_MS, self._poll)
+
+    def _dispatch(self, ev: dict):
+        line = describe(ev)
+        if line:
+            self._log(line)
+        kind = ev["event"]
+        if kind == "listed":
+            if self._progress is not None:
+                self._progress.config(maximum=max(ev["total"], 1), value=0)
+        elif kind == "done" or (kind == "error" and "url" in ev):
+            self.completed += kind == "done"
+            if self._completed_lbl is not None:
+                self._completed_lbl.config(text=f"Completed [{self.completed}]")
+            if self._progress is not None:
+                self._progress["value"] += 1
+        elif kind == "queued":
+            self.running += 1
+            if self._button is not None:
+                self._button.config(state="disabled")
+        elif kind == "finished":
+            self.running -= 1
+            if not self.running and self._button is not None:
+                self._button.config(state="normal")
+        if self._on_event is not None:
+            self._on_event(ev)
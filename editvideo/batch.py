@@ -0,0 +1,267 @@
+"""Headless batch rendering from a JSON/YAML manifest.
+
+    python batch.py manifest.json [--workers N] [--force] [--restart] [--progress] [--dry-run]
+
+Example manifest:
+
+    {
+      "layout": "edit",
+      "inputs": ["clips/*.mp4", "more/*.mov"],
+      "output_dir": "out",
+      "background": {"mode": "random", "path": "backgrounds/"},
+      "overlay": {"w": 580, "h": 700},
+      "border": {"size": 5, "color": "#0000FF"},
+      "logo": {"path": "logo.png", "x": 20, "y": 20, "size": 100},
+      "text": {"text": "Follow for more", "color": "#FF0000", "size": 28},
+      "encoder": "libx264",
+      "quality": "balanced",
+      "workers": 4,
+      "skip_unchanged": true,
+      "schedule": "cost"
+    }
+
+To render several layouts from one decode of each clip, list them under
+"variants"; each entry overrides top-level keys and gets its own output
+suffix (default "_<layout>"):
+
+    "variants": [{"layout": "edit"}, {"layout": "logo"},
+                 {"layout": "backgr", "overlay": {"w": 400, "h": 700}}]
+
+"encoder" is any name in encoders.ENCODERS (libx264, libx265, libsvtav1,
+h264_nvenc, h264_qsv, h264_vaapi); ones this ffmpeg lacks, or hardware that
+fails, fall back to libx264. The older "render": "CPU" / "GPU" still works.
+"quality" is high, balanced (default) or fast.
+
+For upload limits set at most one of: "max_mb" (each output fits in that
+many MB; the video bitrate is worked out from the clip's duration and
+libx264 encodes in two passes), "bitrate_kbps" (average video bitrate) or
+"max_kbps" (keep "quality" but cap the video bitrate there).
+
+"segments": N splits clips of a minute or more per part into N pieces
+at keyframes that are encoded in parallel and joined again; worth it for a
+few long clips on a machine with cores to spare. Default 1 (off).
+
+"limits" keeps rendering from starving the rest of the machine (see
+governor.py); unset keys come from the EDITVIDEO_* environment variables:
+
+    "limits": {"max_cores": 6, "nice": 10, "ionice": "idle", "memory_mb": 2048}
+
+Each clip's ffmpeg output is logged as JSON lines to <log_dir>/<clip>-<hash>.jsonl
+while it renders (<hash> is of the clip's full path, so same-named clips from
+different folders don't share a log); "log_dir" defaults to output_dir/.logs,
+null turns it off.
+
+"schedule" picks the queue order: "cost" (default, frames x source pixels,
+biggest first), "duration" (longest first) or "name".
+
+Relative paths are resolved against the manifest's folder. One JSON object
+per clip is written to stdout as soon as it finishes, followed by a summary.
+Clips whose output is unchanged since the last run are reported as "skipped"
+(see cache.py); pass --force to re-render everything.
+
+A batch that was interrupted picks up where it stopped: clips it already
+finished are listed in the output folder's journal (see journal.py) and are
+reported as "skipped". Pass --restart to throw the journal away (--force
+and "skip_unchanged": false do too).
+"""
+import argparse, glob, json, os, signal, sys, threading, time
+from dataclasses import replace
+
+from cache import RenderCache
+from engine import VIDEO_EXTS, RenderJob, build_encode_cmds, ffmpeg_exists, prepare_variant
+from governor import Limits
+from journal import BatchJournal
+from pool import LOG_DIR_NAME, RenderPool, RenderCancelled
+from probe import MediaIndex, probe_media
+from runner import SCHEDULES, BatchRunner
+
+class ManifestError(ValueError):
+    pass
+
+def load_manifest(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        if path.lower().endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ManifestError("PyYAML is required for YAML manifests (pip install pyyaml).")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    if not isinstance(data, dict):
+        raise ManifestError("Manifest must be a mapping.")
+    return data
+
+def _section(m: dict, key: str) -> dict:
+    value = m.get(key) or {}
+    if not isinstance(value, dict):
+        raise ManifestError(f"'{key}' must be a mapping.")
+    return value
+
+def job_from_manifest(m: dict, base_dir: str = ".") -> RenderJob:
+    def path(p):
+        return os.path.join(base_dir, p) if p and not os.path.isabs(p) else (p or "")
+
+    canvas = _section(m, "canvas")
+    bg = _section(m, "background")
+    overlay = _section(m, "overlay")
+    border = _section(m, "border")
+    logo = _section(m, "logo")
+    text = _section(m, "text")
+    try:
+        return RenderJob(
+            layout=m.get("layout", "edit"),
+            canvas_w=int(canvas.get("w", 0)), canvas_h=int(canvas.get("h", 0)),
+            bg_mode=bg.get("mode", "choose"), bg_path=path(bg.get("path")),
+            overlay_w=int(overlay.get("w", 0)), overlay_h=int(overlay.get("h", 0)),
+            border=bool(border) and bool(border.get("enabled", True)), border_size=int(border.get("size", 5)),
+            border_color=border.get("color", "#0000FF"),
+            logo_path=path(logo.get("path")), logo_x=int(logo.get("x", 20)),
+            logo_y=int(logo.get("y", 20)), logo_size=int(logo.get("size", 100)),
+            text=text.get("text", ""), text_color=text.get("color", "#FF0000"),
+            text_size=int(text.get("size", 28)),
+            opacity=float(m.get("opacity", 1.0)),
+            encoder=m.get("encoder") or m.get("render") or "libx264",
+            quality=m.get("quality", "balanced"),
+            suffix=m.get("suffix", "_tiktok"),
+            prescale_bg=bool(m.get("prescale_background", True)),
+            smart_copy=bool(m.get("smart_copy", True)),
+            segments=int(m.get("segments", 1)),
+            static_plates=bool(m.get("static_plates", True)),
+            max_mb=float(m.get("max_mb", 0)),
+            bitrate_kbps=int(m.get("bitrate_kbps", 0)),
+            max_kbps=int(m.get("max_kbps", 0)),
+        )
+    except (TypeError, ValueError) as e:
+        raise ManifestError(str(e))
+
+def jobs_from_manifest(m: dict, base_dir: str = ".") -> list:
+    """One RenderJob, or one per entry of "variants" (each overrides top-level keys)."""
+    variants = m.get("variants")
+    if not variants:
+        return [job_from_manifest(m, base_dir)]
+    if not isinstance(variants, list) or not all(isinstance(v, dict) for v in variants):
+        raise ManifestError("'variants' must be a list of mappings.")
+    jobs = []
+    for v in variants:
+        merged = {**m, **v}
+        if "suffix" not in v:
+            merged["suffix"] = f"_{merged.get('layout', 'edit')}"
+        jobs.append(job_from_manifest(merged, base_dir))
+    if len({j.suffix for j in jobs}) != len(jobs):
+        raise ManifestError("Each variant needs a distinct 'suffix'.")
+    return jobs
+
+def limits_from_manifest(m: dict) -> Limits:
+    limits = _section(m, "limits")
+    try:
+        return Limits.from_env()._replace(**{k: v for k, v in limits.items() if k in Limits._fields}).checked()
+    except (TypeError, ValueError) as e:
+        raise ManifestError(f"'limits': {e}")
+
+def expand_inputs(patterns, base_dir: str = "."):
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    if not patterns:
+        raise ManifestError("'inputs' must list at least one file or glob.")
+    files = set()
+    for pattern in patterns:
+        if not os.path.isabs(pattern):
+            pattern = os.path.join(base_dir, pattern)
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*")
+        files.update(p for p in glob.glob(pattern, recursive=True) if p.lower().endswith(VIDEO_EXTS))
+    return sorted(files)
+
+def emit(record: dict, lock=threading.Lock()):
+    with lock:
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Render editvideo layouts from a manifest, without a display.")
+    ap.add_argument("manifest", help="JSON or YAML job manifest")
+    ap.add_argument("--workers", type=int, help="parallel ffmpeg jobs (overrides the manifest)")
+    ap.add_argument("--force", action="store_true", help="re-render clips even if their output is up to date")
+    ap.add_argument("--restart", action="store_true", help="ignore clips an interrupted run already finished")
+    ap.add_argument("--progress", action="store_true", help="also stream live ffmpeg progress events")
+    ap.add_argument("--dry-run", action="store_true", help="print the ffmpeg command for each clip and exit")
+    args = ap.parse_args(argv)
+
+    try:
+        m = load_manifest(args.manifest)
+        base_dir = os.path.dirname(os.path.abspath(args.manifest))
+        jobs = jobs_from_manifest(m, base_dir)
+        files = expand_inputs(m.get("inputs"), base_dir)
+        out_dir = m.get("output_dir") or ""
+        if not out_dir:
+            raise ManifestError("'output_dir' is required.")
+        out_dir = os.path.join(base_dir, out_dir)
+        log_dir = m.get("log_dir", LOG_DIR_NAME)
+        log_dir = os.path.join(out_dir if "log_dir" not in m else base_dir, log_dir) if log_dir else None
+        limits = limits_from_manifest(m)
+        if m.get("schedule", "cost") not in SCHEDULES:
+            raise ManifestError("'schedule' must be cost, duration or name.")
+    except (OSError, ValueError) as e:
+        emit({"event": "error", "error": f"{args.manifest}: {e}"})
+        return 2
+
+    if args.dry_run:
+        for path in files:
+            try:
+                # A size limit needs the clip's duration
+                info = probe_media(path) if any(job.max_mb for job in jobs) else None
+                # Without pre-rendered stills, so a dry run never writes to the background cache
+                variants = [prepare_variant(replace(job, prescale_bg=False, static_plates=False), path, out_dir, None,
+                                            info) for job in jobs]
+                *first, cmd = build_encode_cmds(path, variants)
+                emit({"event": "command", "input": path, "cmd": cmd, **({"first_pass": first[0]} if first else {})})
+            except (RuntimeError, ValueError) as e:
+                emit({"event": "error", "input": path, "error": str(e)})
+        return 0
+
+    if not ffmpeg_exists():
+        emit({"event": "error", "error": "FFmpeg not found on PATH."})
+        return 2
+    os.makedirs(out_dir, exist_ok=True)
+
+    pool = RenderPool(args.workers or m.get("workers"), log_dir=log_dir, limits=limits)
+    cache = RenderCache(out_dir, force=args.force or not m.get("skip_unchanged", True))
+    journal = BatchJournal(out_dir, jobs, files)
+    if args.restart or cache.force:
+        # A full re-render passes nothing over; the journal only tracks this run
+        journal.discard()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: pool.cancel())
+
+    last = {}
+    failed = []
+
+    def on_progress(path, snap):
+        last[path] = snap
+        if args.progress:
+            emit({"event": "progress", "input": path, **snap, "batch_eta": runner.eta()})
+
+    def on_done(path, results, seconds):
+        snap = last.get(path, {})
+        for result in results:
+            emit({"event": "skipped" if result.skipped else "done", "input": path, "output": result.output,
+                  "seconds": seconds,
+                  "encoder": result.encoder, "fallback": result.fallback,
+                  "fps": snap.get("fps"), "speed": snap.get("speed"), "duration": runner.infos[path].get("duration")})
+
+    def on_error(path, e):
+        failed.append(path)
+        status = "cancelled" if isinstance(e, RenderCancelled) else "error"
+        emit({"event": status, "input": path, "error": str(e)})
+
+    runner = BatchRunner(jobs, out_dir, pool, cache, MediaIndex(), journal,
+                         on_progress=on_progress, on_done=on_done, on_error=on_error)
+    t0 = time.monotonic()
+    runner.run(files, m.get("schedule", "cost"))
+    emit({"event": "summary", "total": len(files), "failed": len(failed),
+          "cancelled": pool.cancelled, "seconds": round(time.monotonic() - t0, 2)})
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""Main window base shared by the editvideo GUIs: file table, render controls and the batch run."""
+import tkinter as tk
+from tkinter import ttk, messagebox
+import os, threading
+from abc import ABCMeta, abstractmethod
+
+from cache import RenderCache
+from encoders import FALLBACK, QUALITIES, choices as encoder_choices
+from engine import list_videos
+from governor import Limits
+from journal import BatchJournal
+from pool import LOG_DIR_NAME, RenderPool, RenderCancelled, default_workers
+from preview import PreviewWindow
+from probe import MediaIndex, describe
+from progress import format_eta, format_progress
+from runner import BatchRunner
+
+class BatchWindow(tk.Tk, metaclass=ABCMeta):
+    """A window that renders every clip in a folder with one RenderJob.
+
+    Subclasses lay out their own settings around _file_table(), _render_controls()
+    and _run_controls(), and provide _job_spec() and a _run_batch() that checks
+    their settings before calling _start_batch(). The batch runs on a
+    runner.BatchRunner; Tk is not thread-safe, so everything its pool threads
+    report reaches the widgets through after().
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.index = MediaIndex()
+        self._pool = None
+        self._runner = None
+        # A bad EDITVIDEO_* value shouldn't keep the window from opening; batch.py does refuse it
+        try:
+            self.limits = Limits.from_env()
+            self._idle_status = ""
+        except ValueError as e:
+            self.limits = Limits()
+            self._idle_status = f"{e}; using no limits"
+
+    @abstractmethod
+    def _job_spec(self):
+        """The RenderJob the current settings describe."""
+
+    @abstractmethod
+    def _run_batch(self):
+        """Create button: check the settings, then _start_batch()."""
+
+    # ---------- Widgets ----------
+    def _file_table(self):
+        """The clip list (self.tree, one row per file name); the caller places it."""
+        cols = ("no", "title", "size", "duration", "res", "codec", "status")
+        self.tree = ttk.Treeview(self, columns=cols, show="headings", height=13)
+        for c in cols:
+            self.tree.heading(c, text=c.capitalize())
+        self.tree.column("no", width=40, anchor="center")
+        self.tree.column("title", width=340, anchor="w")
+        self.tree.column("size", width=90, anchor="e")
+        self.tree.column("duration", width=70, anchor="e")
+        self.tree.column("res", width=90, anchor="center")
+        self.tree.column("codec", width=60, anchor="center")
+        self.tree.column("status", width=150, anchor="w")
+        self.tree.bind("<Double-1>", lambda e: self._preview())
+        return self.tree
+
+    def _render_controls(self, parent):
+        """Encoder, quality and upload size limit, in a frame the caller places."""
+        frame = ttk.Frame(parent)
+        self.encoder_var = tk.StringVar(value=FALLBACK)
+        ttk.Combobox(frame, textvariable=self.encoder_var, values=encoder_choices(), width=11, state="readonly")\
+            .grid(row=0, column=0, sticky="w")
+        self.quality_var = tk.StringVar(value="balanced")
+        ttk.Combobox(frame, textvariable=self.quality_var, values=QUALITIES, width=9, state="readonly")\
+            .grid(row=0, column=1, sticky="w", padx=(6, 0))
+        # Upload limit: each output is encoded to fit this size (0 = no limit)
+        ttk.Label(frame, text="Max MB").grid(row=0, column=2, sticky="w", padx=(10, 0))
+        self.max_mb_var = tk.DoubleVar(value=0)
+        ttk.Entry(frame, textvariable=self.max_mb_var, width=5).grid(row=0, column=3, sticky="w", padx=(6, 0))
+        return frame
+
+    def _run_controls(self, parent, segments: bool = False):
+        """Create / Stop / Preview buttons and batch options, in a frame the caller places.
+
+        segments adds "Split long videos" (self.segments_var) for layouts that use it.
+        """
+        frame = ttk.Frame(parent)
+        self.create_btn = ttk.Button(frame, text="Create TikTok Videos", command=self._run_batch)
+        self.create_btn.grid(row=0, column=0, padx=(0, 8))
+        self.stop_btn = ttk.Button(frame, text="Stop", command=self._stop_batch, state="disabled")
+        self.stop_btn.grid(row=0, column=1, padx=(0, 8))
+        ttk.Button(frame, text="Preview", command=self._preview).grid(row=0, column=2, padx=(0, 16))
+        ttk.Label(frame, text="Parallel Jobs").grid(row=0, column=3, sticky="w")
+        self.workers_var = tk.IntVar(value=default_workers(self.limits))
+        ttk.Entry(frame, textvariable=self.workers_var, width=4).grid(row=0, column=4, sticky="w", padx=(6, 0))
+        col = 5
+        if segments:
+            # Long clips (a minute or more per part) are cut into this many parts encoded in parallel
+            ttk.Label(frame, text="Split long videos").grid(row=0, column=col, sticky="w", padx=(16, 0))
+            self.segments_var = tk.IntVar(value=1)
+            ttk.Spinbox(frame, from_=1, to=16, textvariable=self.segments_var, width=3)\
+                .grid(row=0, column=col + 1, sticky="w", padx=(6, 0))
+            col += 2
+        self.skip_unchanged_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(frame, text="Skip unchanged", variable=self.skip_unchanged_var)\
+            .grid(row=0, column=col, sticky="w", padx=(16, 0))
+        self.batch_eta_var = tk.StringVar(value=self._idle_status)
+        ttk.Label(frame, textvariable=self.batch_eta_var).grid(row=0, column=col + 1, sticky="w", padx=(16, 0))
+        return frame
+
+    # ---------- Files ----------
+    def _load_videos(self, folder):
+        self.tree.delete(*self.tree.get_children())
+        files = list_videos(folder)
+        for i, f in enumerate(files, start=1):
+            size_mb = os.path.getsize(os.path.join(folder, f)) / (1024 * 1024.0)
+            self.tree.insert("", "end", iid=f, values=(i, f, f"{size_mb:.2f} MB", "…", "…", "…", "Ready"))
+
+        # Probe in the background; clips already in the index fill in immediately
+        def worker():
+            infos = self.index.probe_all([os.path.join(folder, f) for f in files])
+            for f in files:
+                self.after(0, self._show_info, f, infos[os.path.join(folder, f)])
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _show_info(self, fname, info):
+        if self.tree.exists(fname):
+            duration, res, codec = describe(info)
+            self.tree.set(fname, "duration", duration)
+            self.tree.set(fname, "res", res)
+            self.tree.set(fname, "codec", codec)
+
+    def _preview(self):
+        in_dir = self.video_folder_var.get().strip()
+        files = list(self.tree.selection()) or list(self.tree.get_children())
+        if not os.path.isdir(in_dir) or not files:
+            messagebox.showerror("Preview", "Choose a Video Folder with at least one video first.")
+            return
+        PreviewWindow(self, self._job_spec, os.path.join(in_dir, files[0]), self.index)
+
+    # ---------- Processing ----------
+    def _set_status(self, path, text):
+        self.after(0, self.tree.set, os.path.basename(path), "status", text)
+
+    def _on_job_progress(self, path, snap):
+        self._set_status(path, format_progress(snap))
+        self.after(0, self.batch_eta_var.set, f"Batch ETA {format_eta(self._runner.eta())}")
+
+    def _on_job_done(self, path, results, seconds):
+        result = results[0]
+        state = "Unchanged" if result.skipped else "Done"
+        if result.fallback:
+            state += f" ({result.encoder} fallback)"
+        self._set_status(path, f"{state} → {os.path.basename(result.output)}")
+
+    def _on_job_error(self, path, e):
+        self._set_status(path, "Cancelled" if isinstance(e, RenderCancelled) else f"Error: {e}")
+
+    def _stop_batch(self):
+        if self._pool:
+            self._pool.cancel()
+        self.stop_btn.config(state="disabled")
+
+    def _batch_ended(self):
+        self.create_btn.config(state="normal")
+        self.stop_btn.config(state="disabled")
+        self.batch_eta_var.set(self._idle_status)
+
+    def _start_batch(self, in_dir, out_dir):
+        """Render every clip in in_dir into out_dir with _job_spec(), in the background."""
+        try:
+            workers = int(self.workers_var.get())
+            if workers <= 0:
+                raise ValueError
+        except (tk.TclError, ValueError):
+            messagebox.showerror("Parallel Jobs", "Parallel Jobs must be a positive number.")
+            return
+        try:
+            job = self._job_spec()
+        except (tk.TclError, ValueError) as e:
+            messagebox.showerror("Settings", f"Invalid settings: {e}")
+            return
+
+        # Disable button while running
+        self.create_btn.config(state="disabled")
+        for child in self.tree.get_children():
+            self.tree.set(child, "status", "Queued")
+
+        pool = self._pool = RenderPool(workers, log_dir=os.path.join(out_dir, LOG_DIR_NAME), limits=self.limits)
+        cache = RenderCache(out_dir, force=not self.skip_unchanged_var.get())
+        self.stop_btn.config(state="normal")
+
+        def worker():
+            try:
+                files = [os.path.join(in_dir, f) for f in list_videos(in_dir)]
+                if not files:
+                    self.after(0, messagebox.showwarning, "No Videos", "No video files found in the selected folder.")
+                    return
+                journal = BatchJournal(out_dir, [job], files)
+                if cache.force:
+                    journal.discard()  # Skip unchanged is off: nothing from an earlier run is passed over
+                self._runner = BatchRunner(
+                    [job], out_dir, pool, cache, self.index, journal=journal,
+                    on_start=lambda path: self._set_status(path, "Processing…"),
+                    on_progress=self._on_job_progress, on_done=self._on_job_done, on_error=self._on_job_error,
+                )
+                self._runner.run(files)
+                if pool.cancelled:
+                    self.after(0, messagebox.showinfo, "Stopped", "Batch stopped.")
+                else:
+                    self.after(0, messagebox.showinfo, "Finished", "All tasks completed.")
+            finally:
+                self.after(0, self._batch_ended)
+
+        threading.Thread(target=worker, daemon=True).start()
@@ -0,0 +1,219 @@
+"""Render benchmark: every layout x encoder preset x concurrency on synthetic clips.
+
+    python bench.py [--layouts edit logo ...] [--encoders libx264 ...]
+                    [--qualities balanced fast] [--workers 1 2 4]
+                    [--sizes 1920x1080 1280x720] [--durations 10] [--clips 4]
+                    [--repeat 1] [--workdir DIR] > results.jsonl
+
+Inputs (testsrc2 video with a sine tone, a background and a logo image) are
+generated into --workdir once and reused by later runs. Each configuration
+renders --clips outputs of one input through a RenderPool in a child process,
+so CPU seconds and peak RSS cover exactly that run's ffmpeg processes.
+
+stdout gets one JSON object per line: an "env" record (commit, ffmpeg
+version, CPUs) and then a "result" per configuration with wall seconds,
+fps, realtime factor, CPU seconds, peak RSS and mean output size.
+"""
+import argparse, itertools, json, os, platform, subprocess, sys, tempfile, time
+from dataclasses import asdict, replace
+
+import encoders
+from batch import emit
+from engine import LAYOUTS, RenderJob, ffmpeg_exists, prepare_variant, render_one
+from governor import Limits
+from pool import RenderPool, cpu_count
+
+try:
+    import resource
+except ImportError:  # Windows: no rusage, CPU/RSS are reported as null
+    resource = None
+
+FPS = 30
+
+# Each layout with the options its GUI turns on, so the graphs are realistic
+LAYOUT_OPTIONS = {
+    "edit": dict(canvas_w=1079, canvas_h=1070, overlay_w=580, overlay_h=700, border=True),
+    "logo": dict(canvas_w=720, canvas_h=1200),
+    "backgr": dict(overlay_w=580, overlay_h=700, border=True, logo_x=295, logo_y=20, logo_size=120,
+                   text="Follow for more"),
+    "fae": dict(),
+    "snack": dict(opacity=0.7),
+}
+USES_LOGO = ("backgr", "fae", "snack")
+
+def _ffmpeg(*args):
+    subprocess.run(["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", *args],
+                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+
+def _make(path, *args):
+    if not os.path.isfile(path):
+        tmp = path + ".part" + os.path.splitext(path)[1]
+        _ffmpeg(*args, tmp)
+        os.replace(tmp, path)
+    return path
+
+def make_clip(workdir: str, w: int, h: int, duration: int) -> str:
+    return _make(
+        os.path.join(workdir, f"src_{w}x{h}_{duration}s.mp4"),
+        "-f", "lavfi", "-i", f"testsrc2=size={w}x{h}:rate={FPS}:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={duration}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-crf", "18", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", "128k", "-shortest",
+    )
+
+def make_images(workdir: str):
+    bg = _make(os.path.join(workdir, "background.png"),
+               "-f", "lavfi", "-i", "testsrc=size=1080x1920", "-frames:v", "1")
+    logo = _make(os.path.join(workdir, "logo.png"),
+                 "-f", "lavfi", "-i", "mandelbrot=size=256x256", "-frames:v", "1")
+    return bg, logo
+
+def bench_job(layout: str, bg: str, logo: str, encoder: str, quality: str) -> RenderJob:
+    # smart_copy off: the point is to time the filter graph and encoder
+    return RenderJob(layout=layout, bg_mode="choose", bg_path=bg,
+                     logo_path=logo if layout in USES_LOGO else "",
+                     encoder=encoder, quality=quality, smart_copy=False,
+                     **LAYOUT_OPTIONS[layout])
+
+def _rss_mb(maxrss):
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return round(maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def run_config(spec: dict) -> dict:
+    """Child side: render spec["clips"] copies of one clip and measure the ffmpeg processes."""
+    job = RenderJob(**spec["job"])
+    clip, out_dir = spec["input"], spec["out_dir"]
+    prepare_variant(job, clip, out_dir, None)  # warm the background/plate caches outside the timing
+    jobs = [replace(job, suffix=f"_bench{i:02d}") for i in range(spec["clips"])]
+    pool = RenderPool(spec["workers"], limits=Limits(**spec["limits"]))
+    used, errors = set(), []
+
+    before = resource.getrusage(resource.RUSAGE_CHILDREN) if resource else None
+    t0 = time.perf_counter()
+    pool.map(jobs, lambda j: render_one(j, clip, out_dir, pool),
+             on_done=lambda j, r: used.add(r.encoder),
+             on_error=lambda j, e: errors.append(str(e)))
+    wall = time.perf_counter() - t0
+    after = resource.getrusage(resource.RUSAGE_CHILDREN) if resource else None
+
+    sizes = []
+    for j in jobs:
+        out = j.output_path(clip, out_dir)
+        if os.path.isfile(out):
+            sizes.append(os.path.getsize(out))
+            if not spec["keep"]:
+                os.remove(out)
+    cpu = None
+    if before is not None:
+        cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    return {
+        "wall_seconds": round(wall, 3),
+        "cpu_seconds": round(cpu, 2) if cpu is not None else None,
+        "peak_rss_mb": _rss_mb(after.ru_maxrss) if after is not None else None,
+        "output_bytes": round(sum(sizes) / len(sizes)) if sizes else None,
+        "threads_per_job": pool.threads,
+        "encoder_used": sorted(used),
+        "errors": errors,
+    }
+
+def _size(text: str):
+    w, sep, h = text.lower().partition("x")
+    if not sep or not w.isdigit() or not h.isdigit():
+        raise argparse.ArgumentTypeError(f"expected WxH, got {text!r}")
+    return int(w), int(h)
+
+def environment(limits: Limits) -> dict:
+    def first_line(cmd):
+        try:
+            out = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+                                 cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout
+            return out.splitlines()[0].strip() if out else None
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "event": "env",
+        "commit": first_line(["git", "rev-parse", "--short", "HEAD"]),
+        "ffmpeg": first_line(["ffmpeg", "-version"]),
+        "cpus": cpu_count(),
+        "limits": limits._asdict(),  # EDITVIDEO_* resource limits, passed on to the children
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the editvideo layouts on synthetic clips.")
+    ap.add_argument("--layouts", nargs="+", default=list(LAYOUTS), choices=list(LAYOUTS))
+    ap.add_argument("--encoders", nargs="+", default=[encoders.FALLBACK], help="encoder names (see encoders.py)")
+    ap.add_argument("--qualities", nargs="+", default=["balanced"], choices=encoders.QUALITIES)
+    ap.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4], help="concurrency levels")
+    ap.add_argument("--sizes", nargs="+", type=_size, default=[(1920, 1080)], help="input WxH")
+    ap.add_argument("--durations", nargs="+", type=int, default=[10], help="input seconds")
+    ap.add_argument("--clips", type=int, default=0, help="outputs per configuration (default: 2 x workers)")
+    ap.add_argument("--repeat", type=int, default=1, help="runs per configuration")
+    ap.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "editvideo-bench"))
+    ap.add_argument("--keep", action="store_true", help="keep rendered outputs")
+    ap.add_argument("--run", help=argparse.SUPPRESS)  # internal: measure one configuration
+    args = ap.parse_args(argv)
+
+    if args.run:
+        print(json.dumps(run_config(json.loads(args.run))))
+        return 0
+
+    try:
+        limits = Limits.from_env()
+    except ValueError as e:
+        emit({"event": "error", "error": str(e)})
+        return 2
+    if not ffmpeg_exists():
+        emit({"event": "error", "error": "FFmpeg not found on PATH."})
+        return 2
+    for name in args.encoders:
+        try:
+            encoders.lookup(name)
+        except ValueError as e:
+            ap.error(str(e))
+    out_dir = os.path.join(args.workdir, "out")
+    os.makedirs(out_dir, exist_ok=True)
+    env = environment(limits)
+    emit(env)
+
+    bg, logo = make_images(args.workdir)
+    child_env = dict(os.environ, EDITVIDEO_CACHE=os.path.join(args.workdir, "cache"))
+    missing = [e for e in args.encoders if encoders.usable(e) != encoders.lookup(e).name]
+    for name in missing:
+        emit({"event": "skipped", "encoder": name, "error": "encoder not in this ffmpeg"})
+    wanted = [e for e in args.encoders if e not in missing]
+
+    failed = 0
+    for (w, h), duration in itertools.product(args.sizes, args.durations):
+        clip = make_clip(args.workdir, w, h, duration)
+        for layout, encoder, quality, workers in itertools.product(args.layouts, wanted, args.qualities, args.workers):
+            clips = args.clips or 2 * workers
+            config = {"layout": layout, "encoder": encoder, "quality": quality, "workers": workers,
+                      "input": f"{w}x{h}", "duration": duration, "clips": clips}
+            spec = {"job": asdict(bench_job(layout, bg, logo, encoder, quality)), "input": clip,
+                    "out_dir": out_dir, "workers": workers, "clips": clips, "keep": args.keep,
+                    "limits": limits._asdict()}
+            for run in range(args.repeat):
+                print(f"{layout} {encoder}/{quality} x{workers} {w}x{h} {duration}s", file=sys.stderr)
+                child = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--run", json.dumps(spec)],
+                    stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=child_env,
+                )
+                if child.returncode != 0:
+                    failed += 1
+                    tail = child.stderr.strip().splitlines()
+                    emit({"event": "error", **config, "run": run, "error": tail[-1] if tail else ""})
+                    continue
+                m = json.loads(child.stdout)
+                failed += bool(m["errors"])
+                media = clips * duration
+                emit({"event": "result", "commit": env["commit"], **config, "run": run, **m,
+                      "fps": round(media * FPS / m["wall_seconds"], 1),
+                      "realtime": round(media / m["wall_seconds"], 2)})
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
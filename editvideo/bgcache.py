@@ -0,0 +1,69 @@
+"""On-disk cache of still frames rendered once and reused by every clip.
+
+Background images are pre-rendered to the exact canvas size, so the filter
+graph overlays the cached frame as-is instead of running scale/crop on every
+frame of every clip. cached_still() does the same for any single-frame graph
+(engine.py uses it for the static logo/text/border plates). Frames are stored
+as BMP, which is the cheapest format for ffmpeg's image input to decode.
+"""
+import hashlib, os, subprocess, threading
+
+CACHE_DIR = os.environ.get(
+    "EDITVIDEO_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "editvideo")
+)
+
+# How the source image is fitted to the canvas
+FIT_FILTERS = {
+    "cover": "scale={w}:{h}:force_original_aspect_ratio=increase,crop={w}:{h}",
+    "stretch": "scale={w}:{h}",
+}
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+def _lock_for(key: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+def _render_once(key: str, out_path: str, cmd_before_output) -> str:
+    # Workers wanting the same frame wait for one render instead of racing
+    with _lock_for(key):
+        if os.path.isfile(out_path):
+            return out_path
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        tmp = out_path + ".part.bmp"
+        result = subprocess.run(cmd_before_output + [tmp], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or "Could not render still frame.")
+        os.replace(tmp, out_path)
+    return out_path
+
+def _ident(path: str) -> str:
+    st = os.stat(path)
+    return f"{os.path.abspath(path)}\0{st.st_size}\0{st.st_mtime_ns}"
+
+def prescaled_background(img: str, w: int, h: int, fit: str = "cover") -> str:
+    """Path of `img` fitted to w x h, rendering it on first use."""
+    ident = f"{_ident(img)}\0{w}x{h}\0{fit}"
+    key = hashlib.blake2b(ident.encode("utf-8"), digest_size=12).hexdigest()
+    out_path = os.path.join(CACHE_DIR, "backgrounds", f"{key}_{w}x{h}_{fit}.bmp")
+    return _render_once(key, out_path, [
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        "-i", img, "-vf", FIT_FILTERS[fit].format(w=w, h=h),
+        "-frames:v", "1", "-pix_fmt", "bgr24",
+    ])
+
+def cached_still(inputs, graph: str, pix_fmt: str = "bgr24") -> str:
+    """Path of the one frame `graph` renders from the image `inputs` (output pad [out]), rendered on first use.
+
+    Use pix_fmt "bgra" to keep transparency.
+    """
+    ident = "\0".join([*(_ident(p) for p in inputs), graph, pix_fmt])
+    key = hashlib.blake2b(ident.encode("utf-8"), digest_size=12).hexdigest()
+    out_path = os.path.join(CACHE_DIR, "plates", f"{key}_{pix_fmt}.bmp")
+    cmd = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error"]
+    for p in inputs:
+        cmd += ["-i", p]
+    return _render_once(key, out_path, [
+        *cmd, "-filter_complex", graph, "-map", "[out]", "-frames:v", "1", "-pix_fmt", pix_fmt,
+    ])
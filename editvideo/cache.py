@@ -0,0 +1,92 @@
+"""Content-hash render cache: skip clips whose output is already up to date.
+
+An output is fresh when it still exists unchanged and was produced from the
+same input/background/logo bytes with the same ffmpeg command. The manifest
+lives next to the outputs (.render_cache.json) so it survives restarts.
+
+A cache made with force=True re-renders everything but still records what it
+made, so the next normal run finds those outputs fresh.
+"""
+import hashlib, json, os, threading
+
+CACHE_NAME = ".render_cache.json"
+
+def _stat_sig(path: str):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+class RenderCache:
+    def __init__(self, out_dir: str, force: bool = False):
+        self.path = os.path.join(out_dir, CACHE_NAME)
+        self.force = force
+        self._lock = threading.Lock()
+        self._data = {"files": {}, "outputs": {}}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._data["files"].update(data.get("files", {}))
+            self._data["outputs"].update(data.get("outputs", {}))
+        except (OSError, ValueError):
+            pass
+
+    def file_hash(self, path: str) -> str:
+        """blake2b of the file contents, memoised by (size, mtime) so unchanged files are hashed once."""
+        path = os.path.abspath(path)
+        sig = _stat_sig(path)
+        with self._lock:
+            known = self._data["files"].get(path)
+        if known and known["sig"] == sig:
+            return known["hash"]
+        h = hashlib.blake2b(digest_size=20)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with self._lock:
+            self._data["files"][path] = {"sig": sig, "hash": digest}
+        return digest
+
+    def key(self, cmd, inputs, out_path: str) -> str:
+        """Hash of the command with input paths replaced by content hashes.
+
+        -threads only changes how the encode is scheduled, so a different pool
+        size does not invalidate earlier outputs.
+        """
+        hashes = {p: self.file_hash(p) for p in inputs}
+        parts, skip = [], False
+        for arg in cmd:
+            if skip:
+                skip = False
+                continue
+            if arg == "-threads":
+                skip = True
+                continue
+            if arg == out_path:
+                continue
+            parts.append(hashes.get(arg, arg))
+        return hashlib.blake2b("\0".join(parts).encode("utf-8"), digest_size=20).hexdigest()
+
+    def previous(self, out_path: str) -> dict:
+        with self._lock:
+            return dict(self._data["outputs"].get(os.path.abspath(out_path), {}))
+
+    def is_fresh(self, out_path: str, key: str) -> bool:
+        entry = self.previous(out_path)
+        if entry.get("key") != key:
+            return False
+        try:
+            return _stat_sig(out_path) == entry.get("sig")
+        except OSError:
+            return False
+
+    def record(self, out_path: str, key: str, **extra):
+        entry = {"key": key, "sig": _stat_sig(out_path), **extra}
+        with self._lock:
+            self._data["outputs"][os.path.abspath(out_path)] = entry
+            self._save()
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, indent=1)
+        os.replace(tmp, self.path)
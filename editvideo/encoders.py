@@ -0,0 +1,147 @@
+"""Video encoders this ffmpeg build offers, with matching quality presets.
+
+`ffmpeg -encoders` is asked once per process. Every encoder maps the same
+quality levels (high / balanced / fast) to its own rate control, so a
+"balanced" clip looks about the same whichever encoder made it. Hardware
+encoders can be compiled in without a device to run them on; engine.py
+falls back to FALLBACK when one fails and stops using it for the session.
+
+Besides constant quality, every encoder can aim at an average bitrate
+(bitrate_args, two passes where the encoder supports it) or keep its
+constant quality under a peak rate (capped_args), for upload size limits.
+"""
+import functools, os, subprocess, threading
+from typing import NamedTuple
+
+FALLBACK = "libx264"
+QUALITIES = ("high", "balanced", "fast")
+VAAPI_DEVICE = os.environ.get("EDITVIDEO_VAAPI_DEVICE", "/dev/dri/renderD128")
+
+# What the old Render: CPU / GPU choice meant
+ALIASES = {"CPU": "libx264", "GPU": "h264_nvenc"}
+
+class Encoder(NamedTuple):
+    name: str
+    hardware: bool
+    presets: dict                       # quality -> codec options
+    global_args: tuple = ()             # go before the inputs
+    out_format: str = "format=yuv420p"  # last filter before [outv]
+    threaded: bool = False              # honours -threads
+    speed: dict = {}                    # quality -> preset only, for bitrate targets
+    bitrate: tuple = ("-b:v", "{k}k", "-maxrate", "{k}k", "-bufsize", "{k2}k")  # average-bitrate mode
+    capped: bool = False                # constant quality honours -maxrate/-bufsize
+    two_pass: bool = False              # supports -pass 1 / -pass 2
+
+ENCODERS = {
+    "libx264": Encoder("libx264", False, {
+        "high": ["-crf", "18", "-preset", "medium"],
+        "balanced": ["-crf", "20", "-preset", "veryfast"],
+        "fast": ["-crf", "23", "-preset", "superfast"],
+    }, threaded=True, speed={
+        "high": ["-preset", "medium"], "balanced": ["-preset", "veryfast"], "fast": ["-preset", "superfast"],
+    }, bitrate=("-b:v", "{k}k"), capped=True, two_pass=True),
+    "libx265": Encoder("libx265", False, {
+        "high": ["-crf", "20", "-preset", "medium", "-tag:v", "hvc1"],
+        "balanced": ["-crf", "22", "-preset", "fast", "-tag:v", "hvc1"],
+        "fast": ["-crf", "26", "-preset", "superfast", "-tag:v", "hvc1"],
+    }, threaded=True, speed={
+        "high": ["-preset", "medium", "-tag:v", "hvc1"], "balanced": ["-preset", "fast", "-tag:v", "hvc1"],
+        "fast": ["-preset", "superfast", "-tag:v", "hvc1"],
+    }, capped=True),
+    "libsvtav1": Encoder("libsvtav1", False, {
+        "high": ["-crf", "28", "-preset", "6"],
+        "balanced": ["-crf", "32", "-preset", "8"],
+        "fast": ["-crf", "36", "-preset", "10"],
+    }, speed={
+        "high": ["-preset", "6"], "balanced": ["-preset", "8"], "fast": ["-preset", "10"],
+    }, bitrate=("-b:v", "{k}k")),
+    "h264_nvenc": Encoder("h264_nvenc", True, {
+        "high": ["-preset", "p6", "-rc", "vbr", "-cq", "19", "-b:v", "0"],
+        "balanced": ["-preset", "p5", "-rc", "vbr", "-cq", "21", "-b:v", "0"],
+        "fast": ["-preset", "p3", "-rc", "vbr", "-cq", "24", "-b:v", "0"],
+    }, speed={
+        "high": ["-preset", "p6"], "balanced": ["-preset", "p5"], "fast": ["-preset", "p3"],
+    }, bitrate=("-rc", "vbr", "-b:v", "{k}k", "-maxrate", "{k}k", "-bufsize", "{k2}k"), capped=True),
+    "h264_qsv": Encoder("h264_qsv", True, {
+        "high": ["-preset", "slow", "-global_quality", "19"],
+        "balanced": ["-preset", "medium", "-global_quality", "21"],
+        "fast": ["-preset", "veryfast", "-global_quality", "24"],
+    }, speed={
+        "high": ["-preset", "slow"], "balanced": ["-preset", "medium"], "fast": ["-preset", "veryfast"],
+    }),
+    "h264_vaapi": Encoder("h264_vaapi", True, {
+        "high": ["-rc_mode", "CQP", "-qp", "19"],
+        "balanced": ["-rc_mode", "CQP", "-qp", "21"],
+        "fast": ["-rc_mode", "CQP", "-qp", "24"],
+    }, global_args=("-vaapi_device", VAAPI_DEVICE), out_format="format=nv12,hwupload",
+       bitrate=("-rc_mode", "VBR", "-b:v", "{k}k", "-maxrate", "{k}k", "-bufsize", "{k2}k")),
+}
+
+_broken = set()
+_broken_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=None)
+def available() -> frozenset:
+    """Names of the video encoders compiled into the ffmpeg on PATH (empty if it won't run)."""
+    try:
+        out = subprocess.run(["ffmpeg", "-hide_banner", "-encoders"], stdout=subprocess.PIPE,
+                             stderr=subprocess.DEVNULL, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return frozenset()
+    names = set()
+    for line in out.splitlines():
+        # " V....D libx264   libx264 H.264 / AVC / MPEG-4 AVC ...", but not the legend's " V..... = Video"
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].startswith("V") and len(parts[0]) == 6 and parts[1] != "=":
+            names.add(parts[1])
+    return frozenset(names)
+
+def choices():
+    """Known encoders usable with this ffmpeg, software first."""
+    have = available()
+    return [name for name in ENCODERS if name in have] or [FALLBACK]
+
+def lookup(name: str) -> Encoder:
+    name = ALIASES.get(name.upper(), name) if name else FALLBACK
+    if name not in ENCODERS:
+        raise ValueError(f"Unknown encoder: {name} (choose from {', '.join(ENCODERS)})")
+    return ENCODERS[name]
+
+def usable(name: str) -> str:
+    """name, or FALLBACK when this ffmpeg lacks it or it already failed this session."""
+    enc = lookup(name)
+    have = available()
+    with _broken_lock:
+        broken = enc.name in _broken
+    if broken or (have and enc.name not in have):
+        return FALLBACK
+    return enc.name
+
+def mark_broken(name: str):
+    with _broken_lock:
+        _broken.add(name)
+
+def bitrate_args(enc: Encoder, quality: str, kbps: int):
+    return [*enc.speed.get(quality, ()), *(a.format(k=kbps, k2=2 * kbps) for a in enc.bitrate)]
+
+def capped_args(enc: Encoder, quality: str, max_kbps: int):
+    """Constant quality that never goes above max_kbps (VBR at max_kbps where the encoder can't do that)."""
+    if not enc.capped:
+        return bitrate_args(enc, quality, max_kbps)
+    return [*enc.presets[quality], "-maxrate", f"{max_kbps}k", "-bufsize", f"{2 * max_kbps}k"]
+
+def codec_args(name: str, quality: str = "balanced", threads: int = 0, bitrate_kbps: int = 0, max_kbps: int = 0):
+    """-c:v and rate control: average bitrate_kbps if set, else quality capped at max_kbps if set, else quality."""
+    enc = lookup(name)
+    if quality not in QUALITIES:
+        raise ValueError(f"Unknown quality: {quality}")
+    if bitrate_kbps:
+        rate = bitrate_args(enc, quality, bitrate_kbps)
+    elif max_kbps:
+        rate = capped_args(enc, quality, max_kbps)
+    else:
+        rate = enc.presets[quality]
+    args = ["-c:v", enc.name, *rate]
+    if enc.threaded and threads:
+        args += ["-threads", str(threads)]
+    return args
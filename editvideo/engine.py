@@ -0,0 +1,781 @@
+"""Headless render engine shared by the editvideo GUIs.
+
+A RenderJob is a declarative description of one layout (canvas, background,
+border, logo, text, opacity, encoder). build_ffmpeg_cmd() turns it into an
+ffmpeg command for one input clip and render_one() runs it, with no Tk at all.
+"""
+import glob, hashlib, os, random, re, shutil, subprocess, tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import NamedTuple
+
+import encoders
+from bgcache import cached_still, prescaled_background
+from pool import RenderPool
+from probe import audio_copyable, probe_media
+from progress import CombinedProgress
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+VIDEO_EXTS = (".mp4", ".mov", ".avi", ".mkv")
+
+# Default canvas per layout, named after the GUI that introduced it
+LAYOUTS = {
+    "edit": (1079, 1070),    # bg image cover, sized video box centered
+    "logo": (720, 1200),     # bg image cover, video fit to 80% height
+    "backgr": (435, 735),    # bg image cover or plain white, sized video box centered
+    "fae": (435, 735),       # bg image stretched, video padded to the canvas
+    "snack": (435, 735),     # video is the background, image is a foreground plate
+}
+
+def ffmpeg_exists() -> bool:
+    try:
+        subprocess.run(["ffmpeg", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        return True
+    except Exception:
+        return False
+
+def to_ffmpeg_color(hex_color: str) -> str:
+    """Convert '#rrggbb' to '0xRRGGBB' for ffmpeg."""
+    if not hex_color:
+        return "0x000000"
+    h = hex_color.strip().lstrip("#")
+    if len(h) == 3:  # short form #rgb
+        h = "".join(ch * 2 for ch in h)
+    return "0x" + h.upper()
+
+def escape_drawtext(text: str) -> str:
+    # Quotes would end the quoted value; ':' and '%' are special to drawtext's own parser
+    text = text.replace("'", "’").replace("\\", "\\\\")
+    return text.replace(":", "\\:").replace("%", "\\%")
+
+def list_videos(folder: str):
+    return sorted(f for f in os.listdir(folder) if f.lower().endswith(VIDEO_EXTS))
+
+def list_images(folder: str):
+    return [os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTS)]
+
+def pick_random_background(folder: str):
+    if not os.path.isdir(folder):
+        return None
+    candidates = list_images(folder)
+    return random.choice(candidates) if candidates else None
+
+@dataclass(frozen=True)
+class RenderJob:
+    """Everything needed to render any clip in a batch with one layout.
+
+    For the "snack" layout the image (bg_mode/bg_path) is laid over the video
+    instead of under it. canvas/overlay sizes of 0 mean "layout default".
+    """
+    layout: str = "edit"
+    canvas_w: int = 0
+    canvas_h: int = 0
+    bg_mode: str = "choose"          # choose | random | white
+    bg_path: str = ""                # image file (choose) or folder (random)
+    overlay_w: int = 0
+    overlay_h: int = 0
+    border: bool = False
+    border_size: int = 5
+    border_color: str = "#0000FF"
+    logo_path: str = ""
+    logo_x: int = 20
+    logo_y: int = 20
+    logo_size: int = 100
+    text: str = ""
+    text_color: str = "#FF0000"
+    text_size: int = 28
+    opacity: float = 1.0
+    encoder: str = encoders.FALLBACK # see encoders.ENCODERS
+    quality: str = "balanced"        # high | balanced | fast
+    threads: int = 0                 # encoder threads per job, 0 = let the encoder decide
+    suffix: str = "_tiktok"
+    prescale_bg: bool = True         # fit background images to the canvas once (bgcache.py)
+    smart_copy: bool = True          # stream-copy audio/video when ffprobe says re-encoding changes nothing
+    segments: int = 1                # split long clips into this many parts encoded side by side
+    static_plates: bool = True       # draw logo/text/border/foreground once into plates, not every frame
+    max_mb: float = 0.0              # fit each output in this many MB (two-pass where the encoder can)
+    bitrate_kbps: int = 0            # or: average video bitrate
+    max_kbps: int = 0                # or: keep `quality` but never go above this video bitrate
+
+    def __post_init__(self):
+        if self.layout not in LAYOUTS:
+            raise ValueError(f"Unknown layout: {self.layout}")
+        if self.bg_mode not in ("choose", "random", "white"):
+            raise ValueError(f"Unknown background mode: {self.bg_mode}")
+        if self.segments < 1:
+            raise ValueError("segments must be at least 1")
+        if self.quality not in encoders.QUALITIES:
+            raise ValueError(f"Unknown quality: {self.quality}")
+        encoders.lookup(self.encoder)
+        limits = (self.max_mb, self.bitrate_kbps, self.max_kbps)
+        if min(limits) < 0:
+            raise ValueError("Size and bitrate limits can't be negative")
+        if sum(bool(x) for x in limits) > 1:
+            raise ValueError("Set only one of max_mb, bitrate_kbps and max_kbps")
+
+    @property
+    def rate_limited(self) -> bool:
+        return bool(self.max_mb or self.bitrate_kbps or self.max_kbps)
+
+    @property
+    def two_pass(self) -> bool:
+        return bool(self.bitrate_kbps) and encoders.lookup(self.encoder).two_pass
+
+    @property
+    def size(self):
+        dw, dh = LAYOUTS[self.layout]
+        return self.canvas_w or dw, self.canvas_h or dh
+
+    @property
+    def bg_fit(self):
+        """How the background image is fitted to the canvas, None if it isn't a background."""
+        if self.layout == "snack" or self.bg_mode == "white":
+            return None
+        return "stretch" if self.layout == "fae" else "cover"
+
+    @property
+    def image_role(self) -> str:
+        return "foreground" if self.layout == "snack" else "background"
+
+    def with_threads(self, threads: int) -> "RenderJob":
+        return replace(self, threads=threads)
+
+    def output_path(self, video_path: str, out_dir: str) -> str:
+        base = os.path.splitext(os.path.basename(video_path))[0]
+        return os.path.join(out_dir, base + self.suffix + ".mp4")
+
+# ---------- Filter graph ----------
+def _video_box(src: str, w: int, h: int, job: RenderJob, label: str, pad: bool = False) -> str:
+    if job.border:
+        bs = max(1, int(job.border_size))
+        inner_w = max(2, w - 2 * bs)
+        inner_h = max(2, h - 2 * bs)
+        color = to_ffmpeg_color(job.border_color)
+        return (
+            f"{src}scale={inner_w}:{inner_h}:force_original_aspect_ratio=decrease,"
+            f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2:color={color}{label}"
+        )
+    chain = f"{src}scale={w}:{h}:force_original_aspect_ratio=decrease"
+    if pad:
+        chain += f",pad={w}:{h}:(ow-iw)/2:(oh-ih)/2"
+    return chain + label
+
+def _cover(src: str, W: int, H: int, label: str) -> str:
+    # Scale up then crop: fills the canvas without distortion
+    return f"{src}scale={W}:{H}:force_original_aspect_ratio=increase,crop={W}:{H}{label}"
+
+def _bg_label(bg_ready: bool) -> str:
+    return "[1]" if bg_ready else "[bg]"
+
+def _overlay_box(job: RenderJob, W: int, H: int, margin: int):
+    w = job.overlay_w or W
+    h = job.overlay_h or H
+    return max(2, min(w, W - margin)), max(2, min(h, H - margin))
+
+def _base_chains(job: RenderJob, bg_ready: bool = False, filled: bool = False, plated: bool = False):
+    """Chains that composite video and background/foreground into [base].
+
+    bg_ready means input 1 is already canvas-sized (bgcache.py) and is used as-is;
+    filled means it is the under plate, with the video box already painted in.
+    plated means the snack foreground is part of the over plate.
+    """
+    W, H = job.size
+    centered = "overlay=(W-w)/2:(H-h)/2:shortest=1"
+
+    def bg(chain):
+        return [] if bg_ready else [chain]
+
+    if filled:
+        w, h = _overlay_box(job, W, H, 0 if job.layout == "fae" else 40)
+        if job.border:
+            bs = max(1, int(job.border_size))
+            w, h = max(2, w - 2 * bs), max(2, h - 2 * bs)
+        return [f"[0]scale={w}:{h}:force_original_aspect_ratio=decrease[v]", f"[1][v]{centered}[base]"]
+
+    if job.layout == "edit":
+        w, h = _overlay_box(job, W, H, 40)
+        return [*bg(_cover("[1]", W, H, "[bg]")), _video_box("[0]", w, h, job, "[v]"), f"{_bg_label(bg_ready)}[v]{centered}[base]"]
+
+    if job.layout == "logo":
+        video = (
+            f"[0]scale=w={W}:h={int(H * 0.8)}:force_original_aspect_ratio=decrease,"
+            f"pad={W}:{H}:(ow-iw)/2:(oh-ih)/2:color=0x00000000[v]"
+        )
+        return [*bg(_cover("[1]", W, H, "[bg]")), video, f"{_bg_label(bg_ready)}[v]overlay=shortest=1[base]"]
+
+    if job.layout == "backgr":
+        w, h = _overlay_box(job, W, H, 40)
+        if job.bg_mode == "white":
+            chains = [f"color=white:size={W}x{H}[bg]"]
+            bg_ready = False
+        else:
+            chains = bg(_cover("[1]", W, H, "[bg]"))
+        return [*chains, _video_box("[0]", w, h, job, "[v]"), f"{_bg_label(bg_ready)}[v]{centered}[base]"]
+
+    if job.layout == "fae":
+        w, h = _overlay_box(job, W, H, 0)
+        return [*bg(f"[1]scale={W}:{H}[bg]"), _video_box("[0]", w, h, job, "[v]", pad=True),
+                f"{_bg_label(bg_ready)}[v]{centered}[base]"]
+
+    # snack: the clip fills the canvas, the image sits on top of it
+    if plated:
+        return [_cover("[0]", W, H, "[base]")]
+    chains = [_cover("[0]", W, H, "[bg]")]
+    opacity = max(0.0, min(1.0, float(job.opacity)))
+    if opacity < 1.0:
+        chains += [
+            _video_box("[1]", W, H, job, "[fg0]"),
+            f"[fg0]format=rgba,colorchannelmixer=aa={opacity}[fg]",
+        ]
+    else:
+        chains.append(_video_box("[1]", W, H, job, "[fg]"))
+    chains.append("[bg][fg]overlay=0:0:shortest=1[base]")
+    return chains
+
+def _logo_image(job: RenderJob) -> str | None:
+    """The logo file to draw, None for no logo.
+
+    fae and snack have always left out a logo that isn't a readable file (their
+    GUIs check an enabled logo up front); the other layouts refuse it.
+    """
+    if not job.logo_path:
+        return None
+    if os.path.isfile(job.logo_path) and os.access(job.logo_path, os.R_OK):
+        return job.logo_path
+    if job.layout in ("fae", "snack"):
+        return None
+    raise RuntimeError("Invalid logo image path.")
+
+def build_filter_complex(job: RenderJob, logo_input: int | str | None = None, bg_ready: bool = False,
+                         plate_input: int | str | None = None, filled: bool = False) -> str:
+    """plate_input is the over plate (see _over_plate), which replaces the logo, text and snack foreground."""
+    W, H = job.size
+    chains = _base_chains(job, bg_ready, filled, plated=plate_input is not None)
+    last = "[base]"
+
+    if plate_input is not None:
+        # A single still frame: overlay keeps repeating it for the whole clip
+        chains.append(f"{last}[{plate_input}]overlay=0:0[plated]")
+        chains.append(f"[plated]{encoders.lookup(job.encoder).out_format}[outv]")
+        return ";".join(chains)
+
+    if logo_input is not None:
+        size = max(10, min(job.logo_size, 300))
+        x = max(0, min(job.logo_x, W - size))
+        y = max(0, min(job.logo_y, H - size))
+        chains.append(f"[{logo_input}]scale={size}:-1[logo]")
+        chains.append(f"{last}[logo]overlay={x}:{y}[withlogo]")
+        last = "[withlogo]"
+
+    finish = ""
+    if job.text:
+        color = job.text_color.lstrip("#")
+        finish += (
+            f"drawtext=text='{escape_drawtext(job.text)}':fontcolor=#{color}:"
+            f"fontsize={job.text_size}:x=20:y=H-th-20,"
+        )
+    chains.append(f"{last}{finish}{encoders.lookup(job.encoder).out_format}[outv]")
+    return ";".join(chains)
+
+# ---------- Static plates ----------
+def _box_fill(job: RenderJob):
+    """Color painted behind the video box (border or fae's black bars), None if nothing is."""
+    if job.layout not in ("edit", "backgr", "fae"):
+        return None
+    if job.border:
+        return to_ffmpeg_color(job.border_color)
+    return "0x000000" if job.layout == "fae" else None
+
+def _under_plate(job: RenderJob, bg_img: str | None) -> str:
+    """Canvas-sized background (bg_img, or white) with the video box painted in."""
+    W, H = job.size
+    w, h = _overlay_box(job, W, H, 0 if job.layout == "fae" else 40)
+    src = "[0]" if bg_img else f"color=white:size={W}x{H},"
+    box = f"drawbox=x={(W - w) // 2}:y={(H - h) // 2}:w={w}:h={h}:color={_box_fill(job)}:t=fill"
+    return cached_still([bg_img] if bg_img else [], f"{src}{box}[out]")
+
+def _over_plate(job: RenderJob, fg_img: str | None):
+    """Transparent canvas with everything drawn over the video, None if nothing is."""
+    W, H = job.size
+    fg = fg_img if job.layout == "snack" else None
+    logo = _logo_image(job)
+    if not (fg or logo or job.text):
+        return None
+    inputs, chains, last = [], [f"color=c=black@0.0:size={W}x{H},format=rgba[c0]"], "[c0]"
+    if fg:
+        inputs.append(fg)
+        chains.append(_video_box("[0]", W, H, job, "[fg0]"))
+        opacity = max(0.0, min(1.0, float(job.opacity)))
+        chains.append(f"[fg0]format=rgba,colorchannelmixer=aa={opacity}[fg]")
+        chains.append(f"{last}[fg]overlay=0:0:format=rgb[c1]")
+        last = "[c1]"
+    if logo:
+        size = max(10, min(job.logo_size, 300))
+        x = max(0, min(job.logo_x, W - size))
+        y = max(0, min(job.logo_y, H - size))
+        chains.append(f"[{len(inputs)}]scale={size}:-1[logo]")
+        inputs.append(logo)
+        chains.append(f"{last}[logo]overlay={x}:{y}:format=rgb[c2]")
+        last = "[c2]"
+    finish = "null"
+    if job.text:
+        color = job.text_color.lstrip("#")
+        finish = (
+            f"drawtext=text='{escape_drawtext(job.text)}':fontcolor=#{color}:"
+            f"fontsize={job.text_size}:x=20:y=H-th-20"
+        )
+    chains.append(f"{last}{finish}[out]")
+    return cached_still(inputs, ";".join(chains), "bgra")
+
+def passlog_prefix(out_path: str) -> str:
+    return os.path.splitext(out_path)[0] + "-passlog"
+
+def video_codec_args(job: RenderJob, pass_no: int = 0, out_path: str = ""):
+    args = encoders.codec_args(job.encoder, job.quality, job.threads, job.bitrate_kbps, job.max_kbps)
+    if pass_no and job.two_pass:
+        args += ["-pass", str(pass_no), "-passlogfile", passlog_prefix(out_path)]
+    return args
+
+def _global_args(jobs):
+    args = []
+    for job in jobs:
+        extra = list(encoders.lookup(job.encoder).global_args)
+        if extra and extra[0] not in args:
+            args += extra
+    return args
+
+AUDIO_KBPS = 128
+SIZE_HEADROOM = 0.97   # mp4 overhead and rate control overshoot, so outputs land under max_mb
+MIN_VIDEO_KBPS = 150
+
+def audio_codec_args(copy_audio: bool = False):
+    return ["-c:a", "copy"] if copy_audio else ["-c:a", "aac", "-b:a", f"{AUDIO_KBPS}k"]
+
+def size_bitrate(job: RenderJob, info: dict) -> int:
+    """Video kbps that makes job.max_mb (1 MB = 10^6 bytes) with the re-encoded audio track."""
+    duration = info.get("duration")
+    if not duration:
+        raise ValueError("A size limit needs the clip's duration, but ffprobe couldn't read it.")
+    audio = AUDIO_KBPS if info.get("acodec") else 0
+    kbps = int(job.max_mb * 8000 * SIZE_HEADROOM / duration) - audio
+    if kbps < MIN_VIDEO_KBPS:
+        raise ValueError(f"{job.max_mb:g} MB is too small for {duration:.0f} s of video.")
+    return kbps
+
+def is_identity(job: RenderJob, info: dict) -> bool:
+    """True when the layout would only reproduce the clip's own frames.
+
+    That is the fae layout with the clip already canvas-sized H.264 filling the
+    whole video box and nothing drawn over it: the stretched background is
+    fully covered, so the video stream can be copied as-is.
+    """
+    if job.layout != "fae" or job.border or _logo_image(job) or job.text:
+        return False
+    W, H = job.size
+    if _overlay_box(job, W, H, 0) != (W, H):
+        return False
+    return (info.get("vcodec") == "h264" and info.get("pix_fmt") == "yuv420p"
+            and (info.get("width"), info.get("height")) == (W, H))
+
+# Outputs carry only the first audio track (0:a:0?): it's the one probe_media()
+# describes, so the only one audio_copyable() vouched for when copying
+def _passthrough_output(out_path: str, copy_audio: bool):
+    return [
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-c:v", "copy", *audio_codec_args(copy_audio),
+        "-movflags", "+faststart",
+        out_path,
+    ]
+
+def resolve_background(job: RenderJob, previous: str | None = None):
+    """Image to use for this clip (None for the white background).
+
+    In random mode the image `previous`ly used for this clip is kept while it is
+    still in the folder, so re-runs can recognise unchanged outputs.
+    """
+    if job.bg_mode == "white":
+        return None
+    if job.bg_mode == "choose":
+        if not os.path.isfile(job.bg_path):
+            raise RuntimeError(f"Invalid {job.image_role} image path.")
+        return job.bg_path
+    if previous and os.path.isfile(previous) and \
+            os.path.abspath(os.path.dirname(previous)) == os.path.abspath(job.bg_path):
+        return previous
+    bg_img = pick_random_background(job.bg_path)
+    if not bg_img:
+        raise RuntimeError(f"No image found in the selected {job.image_role} folder.")
+    return bg_img
+
+def _graph_inputs(job: RenderJob, in_video: str, bg_img, bg_ready: bool, plate, filled: bool):
+    """ffmpeg input options (the clip first) and the filter graph reading them, ending in [outv]."""
+    inputs = ["-i", in_video]
+    if bg_img is not None:
+        inputs += ["-loop", "1", "-i", bg_img]
+    logo_input = plate_input = None
+    if plate is not None:
+        plate_input = inputs.count("-i")
+        inputs += ["-i", plate]
+    elif _logo_image(job):
+        logo_input = inputs.count("-i")
+        inputs += ["-i", job.logo_path]
+    return inputs, build_filter_complex(job, logo_input, bg_ready, plate_input, filled)
+
+def _encoded_output(job: RenderJob, label: str, out_path: str, copy_audio: bool, pass_no: int = 0):
+    if pass_no == 1:
+        # The first pass only writes the encoder's stats next to out_path
+        return ["-map", label, "-an", *video_codec_args(job, 1, out_path), "-f", "null", os.devnull]
+    return [
+        "-map", label, "-map", "0:a:0?",
+        *video_codec_args(job, pass_no, out_path),
+        *audio_codec_args(copy_audio),
+        "-movflags", "+faststart",
+        out_path,
+    ]
+
+def build_ffmpeg_cmd(job: RenderJob, in_video: str, out_path: str, bg_img: str | None, bg_ready: bool = False,
+                     copy_audio: bool = False, passthrough: bool = False, plate: str | None = None,
+                     filled: bool = False, pass_no: int = 0):
+    """pass_no 1 or 2 makes the first or second run of a two-pass encode (see build_encode_cmds)."""
+    if passthrough:
+        return ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-i", in_video,
+                *_passthrough_output(out_path, copy_audio)]
+
+    inputs, graph = _graph_inputs(job, in_video, bg_img, bg_ready, plate, filled)
+    return [
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        *_global_args([job]), *inputs,
+        "-filter_complex", graph,
+        *_encoded_output(job, "[outv]", out_path, copy_audio, pass_no),
+    ]
+
+# ---------- Preview ----------
+PREVIEW_HEIGHT = 360
+
+def render_preview(job: RenderJob, video_path: str, out_dir: str, excerpt: float = 0.0, fps: int = 5,
+                   height: int = PREVIEW_HEIGHT, info: dict | None = None) -> list:
+    """Small PNGs of exactly what `job` makes of video_path, without encoding anything.
+
+    Stills from 10%, 50% and 90% into the clip, or with excerpt > 0 the frames of
+    an `excerpt`-second stretch from its middle at `fps`. Returns the PNG paths in order.
+    """
+    info = info if info is not None else probe_media(video_path)
+    duration = info.get("duration") or 0.0
+    # A still only needs the picture: no size target, rate cap or segmenting
+    job = replace(job, encoder=encoders.FALLBACK, smart_copy=False, max_mb=0.0, bitrate_kbps=0, max_kbps=0,
+                  segments=1)
+    v = prepare_variant(job, video_path, out_dir, None, info)
+    inputs, graph = _graph_inputs(v.job, video_path, v.bg_img, v.bg_ready, v.plate, v.filled)
+    height = min(height, job.size[1])
+
+    def run(start, limit, chain, out):
+        cmd = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-ss", f"{start:.3f}", *limit,
+               *inputs, "-filter_complex", f"{graph};[outv]{chain}scale=-2:{height}[prev]", "-map", "[prev]", *out]
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or "FFmpeg failed.")
+
+    os.makedirs(out_dir, exist_ok=True)
+    if excerpt > 0:
+        start = max(0.0, duration / 2 - excerpt / 2)
+        run(start, ["-t", f"{excerpt:.3f}"], f"fps={fps},", [os.path.join(out_dir, "excerpt_%03d.png")])
+        return sorted(os.path.join(out_dir, f) for f in os.listdir(out_dir) if f.startswith("excerpt_"))
+
+    times = [duration * f for f in (0.1, 0.5, 0.9)] if duration else [0.0]
+    paths = [os.path.join(out_dir, f"still_{k}.png") for k in range(len(times))]
+    with ThreadPoolExecutor(max_workers=len(times)) as ex:
+        list(ex.map(lambda k: run(times[k], [], "", ["-frames:v", "1", paths[k]]), range(len(times))))
+    return paths
+
+# ---------- Multi-variant (one decode, many outputs) ----------
+_LABEL = re.compile(r"\[(\w+)\]")
+
+def _relabel(graph: str, mapping: dict, k: int) -> str:
+    """Rename pad labels for variant k: inputs via mapping, named pads get a k suffix.
+
+    Quoted option values (drawtext captions) are left untouched.
+    """
+    def sub(m):
+        name = m.group(1)
+        if name in mapping:
+            return f"[{mapping[name]}]"
+        return m.group(0) if name.isdigit() else f"[{name}{k}]"
+
+    parts = graph.split("'")
+    parts[::2] = [_LABEL.sub(sub, p) for p in parts[::2]]
+    return "'".join(parts)
+
+class Variant(NamedTuple):
+    job: RenderJob
+    out_path: str
+    src_bg: str | None      # background as chosen (random mode remembers this one)
+    bg_img: str | None      # what ffmpeg actually reads (pre-scaled copy if bg_ready)
+    bg_ready: bool
+    key: str | None         # render cache key
+    copy_audio: bool = False
+    passthrough: bool = False   # video stream copied, no filter graph
+    plate: str | None = None    # over plate: logo, text and snack foreground in one still
+    filled: bool = False        # bg_img is the under plate (video box painted in)
+
+def prepare_variant(job: RenderJob, video_path: str, out_dir: str, cache, info: dict | None = None) -> Variant:
+    """Resolve background, pre-scaling, stream-copy decisions and cache key for one output.
+
+    info is the clip's probe.probe_media() result; without it nothing is stream-copied.
+    """
+    out_path = job.output_path(video_path, out_dir)
+    sized = bool(job.max_mb)
+    if sized:
+        # From here on the job carries the bitrate that fits this clip into max_mb
+        job = replace(job, max_mb=0.0, bitrate_kbps=size_bitrate(job, info or {}))
+    smart = job.smart_copy and bool(info)
+    # A copied stream keeps whatever bitrate the source had; the size budget assumes AUDIO_KBPS
+    passthrough = smart and not job.rate_limited and is_identity(job, info)
+    copy_audio = smart and not sized and audio_copyable(info)
+
+    previous = cache.previous(out_path) if cache is not None and not cache.force else {}
+    src_bg = None if passthrough else resolve_background(job, previous.get("background"))
+    bg_img, bg_ready = src_bg, False
+    if src_bg and job.prescale_bg and job.bg_fit:
+        bg_img, bg_ready = prescaled_background(src_bg, *job.size, job.bg_fit), True
+    plate, filled = None, False
+    if job.static_plates and not passthrough:
+        # Layers that never change are drawn once instead of on every frame
+        if _box_fill(job) and (bg_ready or (job.layout == "backgr" and job.bg_mode == "white")):
+            bg_img, bg_ready, filled = _under_plate(job, bg_img), True, True
+        plate = _over_plate(job, src_bg)
+        if plate and job.layout == "snack":
+            bg_img = None  # the foreground image is part of the plate
+    key = None
+    if cache is not None:
+        # Keyed on the single-output command so multi-variant and single runs share entries
+        cmd = build_ffmpeg_cmd(job, video_path, out_path, bg_img, bg_ready, copy_audio, passthrough, plate, filled)
+        key = cache.key(cmd, [p for p in (video_path, bg_img, _logo_image(job), plate) if p], out_path)
+    return Variant(job, out_path, src_bg, bg_img, bg_ready, key, copy_audio, passthrough, plate, filled)
+
+def build_variants_cmd(video_path: str, variants, pass_no: int = 0) -> list:
+    """One ffmpeg run that decodes video_path once and splits it into every variant's graph.
+
+    pass_no 1 is the first pass of the two-pass variants alone, 2 the final run of all of them.
+    """
+    if pass_no == 1:
+        variants = [v for v in variants if not v.passthrough and v.job.two_pass]
+    if len(variants) == 1:
+        v = variants[0]
+        return build_ffmpeg_cmd(v.job, video_path, v.out_path, v.bg_img, v.bg_ready, v.copy_audio, v.passthrough,
+                                v.plate, v.filled, pass_no)
+
+    inputs = ["-i", video_path]
+    graphs, outputs = [], []
+    n = sum(not v.passthrough for v in variants)
+    if n > 1:
+        graphs.append(f"[0]split={n}" + "".join(f"[src{k}]" for k in range(n)))
+    k = -1
+    for v in variants:
+        if v.passthrough:
+            outputs += _passthrough_output(v.out_path, v.copy_audio)
+            continue
+        k += 1
+        mapping = {"0": f"src{k}" if n > 1 else "0"}
+        if v.bg_img is not None:
+            mapping["1"] = str(inputs.count("-i"))
+            inputs += ["-loop", "1", "-i", v.bg_img]
+        logo_input = plate_input = None
+        if v.plate is not None:
+            plate_input = "platein"
+            mapping["platein"] = str(inputs.count("-i"))
+            inputs += ["-i", v.plate]
+        elif _logo_image(v.job):
+            logo_input = "logoin"
+            mapping["logoin"] = str(inputs.count("-i"))
+            inputs += ["-i", v.job.logo_path]
+        graphs.append(_relabel(build_filter_complex(v.job, logo_input, v.bg_ready, plate_input, v.filled),
+                               mapping, k))
+        outputs += _encoded_output(v.job, f"[outv{k}]", v.out_path, v.copy_audio, pass_no)
+
+    encoding = [v.job for v in variants if not v.passthrough]
+    cmd = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", *_global_args(encoding), *inputs]
+    if graphs:
+        cmd += ["-filter_complex", ";".join(graphs)]
+    return cmd + outputs
+
+def build_encode_cmds(video_path: str, variants) -> list:
+    """The ffmpeg runs that make `variants`: one, or a first pass and the final run when any is two-pass."""
+    if any(v.job.two_pass and not v.passthrough for v in variants):
+        return [build_variants_cmd(video_path, variants, 1), build_variants_cmd(video_path, variants, 2)]
+    return [build_variants_cmd(video_path, variants)]
+
+class RenderResult(NamedTuple):
+    output: str
+    skipped: bool = False   # output was already up to date in the render cache
+    encoder: str = ""       # encoder that actually produced it
+    fallback: bool = False  # not the requested encoder (missing from this ffmpeg or failed)
+
+class FFmpegError(RuntimeError):
+    pass
+
+PARTIAL_DIR = ".partial"
+
+def partial_path(out_path: str) -> str:
+    """Where ffmpeg writes out_path until it has finished (same folder, so the rename is atomic)."""
+    folder, name = os.path.split(out_path)
+    return os.path.join(folder, PARTIAL_DIR, name)
+
+# ---------- Segment-parallel encoding of long clips ----------
+SEGMENT_MIN_SECONDS = 60   # shorter parts aren't worth the extra ffmpeg start-up and concat
+
+def segment_count(jobs, info: dict) -> int:
+    """How many parts to cut the clip into; 1 means encode it in one go."""
+    wanted = max(job.segments for job in jobs)
+    return max(1, min(wanted, int((info.get("duration") or 0) // SEGMENT_MIN_SECONDS)))
+
+def _ffmpeg_checked(runner, cmd, on_progress=None, duration=None):
+    result = runner.run(cmd, on_progress, duration)
+    if result.returncode != 0:
+        raise FFmpegError(result.stderr.strip() or "FFmpeg failed.")
+
+def _encode(runner, video_path: str, variants, on_progress=None, duration=None):
+    cmds = build_encode_cmds(video_path, variants)
+    if len(cmds) == 1:
+        _ffmpeg_checked(runner, cmds[0], on_progress, duration)
+        return
+    # Both passes read the whole clip, so progress counts the clip twice
+    progress = CombinedProgress(2 * duration if duration else None, on_progress, 2) if on_progress else None
+    try:
+        for n, cmd in enumerate(cmds):
+            _ffmpeg_checked(runner, cmd, progress and progress.part(n), duration)
+    finally:
+        for v in variants:
+            for log in glob.glob(glob.escape(passlog_prefix(v.out_path)) + "*"):
+                os.remove(log)
+
+def _split_at_keyframes(runner, video_path: str, parts: int, duration: float, work: str) -> list:
+    # Stream copy cuts at the first keyframe after each time, so no frame is lost or doubled
+    times = ",".join(f"{duration * k / parts:.3f}" for k in range(1, parts))
+    _ffmpeg_checked(runner, [
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-i", video_path,
+        "-map", "0:v:0", "-c", "copy", "-f", "segment", "-segment_times", times,
+        "-reset_timestamps", "1", os.path.join(work, "src_%03d.mp4"),
+    ])
+    return sorted(os.path.join(work, f) for f in os.listdir(work) if f.startswith("src_"))
+
+def _encode_segmented(runner, video_path: str, variants, parts: int, info: dict, on_progress=None):
+    """Encode every variant in `parts` keyframe-aligned pieces at once, then concat them.
+
+    The pieces are video only; audio is taken from the source in the final
+    concat pass, so AAC priming at piece boundaries can't shift or click it.
+    The layers drawn over the video are static, so the pieces line up seamlessly.
+    """
+    work = tempfile.mkdtemp(prefix="segments-", dir=os.path.dirname(variants[0].out_path))
+    try:
+        pieces = _split_at_keyframes(runner, video_path, parts, info["duration"], work)
+        passes = 2 if any(v.job.two_pass and not v.passthrough for v in variants) else 1
+        progress = CombinedProgress(passes * info["duration"], on_progress, len(pieces)) if on_progress else None
+
+        def encode(k):
+            # The pieces share the clip's thread budget
+            outs = [v._replace(job=v.job.with_threads(max(1, v.job.threads // len(pieces))) if v.job.threads
+                               else v.job, out_path=os.path.join(work, f"out{j}_{k:03d}.mp4"))
+                    for j, v in enumerate(variants)]
+            _encode(runner, pieces[k], outs, progress and progress.part(k))
+            return [o.out_path for o in outs]
+
+        with ThreadPoolExecutor(max_workers=len(pieces)) as ex:
+            encoded = list(ex.map(encode, range(len(pieces))))
+
+        for j, v in enumerate(variants):
+            listing = os.path.join(work, f"concat{j}.txt")
+            with open(listing, "w", encoding="utf-8") as f:
+                for outs in encoded:
+                    f.write("file '{}'\n".format(outs[j].replace("'", "'\\''")))
+            _ffmpeg_checked(runner, [
+                "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+                "-f", "concat", "-safe", "0", "-i", listing, "-i", video_path,
+                "-map", "0:v", "-map", "1:a:0?", "-c:v", "copy", *audio_codec_args(v.copy_audio),
+                "-movflags", "+faststart", v.out_path,
+            ])
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+def _render_prepared(jobs, video_path, out_dir, runner, cache, on_progress, info):
+    variants = [prepare_variant(job, video_path, out_dir, cache, info) for job in jobs]
+    out_paths = [v.out_path for v in variants]
+    if len(set(out_paths)) != len(out_paths):
+        raise ValueError("Variants write to the same file; give each one a distinct suffix.")
+
+    stale = [v for v in variants if cache is None or cache.force or not cache.is_fresh(v.out_path, v.key)]
+    if stale:
+        # A crash or Stop never leaves a truncated file under the final name
+        staged = [v._replace(out_path=partial_path(v.out_path)) for v in stale]
+        for v in staged:
+            os.makedirs(os.path.dirname(v.out_path), exist_ok=True)
+        try:
+            parts = 1 if all(v.passthrough for v in stale) else segment_count([v.job for v in stale], info)
+            if parts > 1:
+                _encode_segmented(runner, video_path, staged, parts, info, on_progress)
+            else:
+                _encode(runner, video_path, staged, on_progress, info.get("duration"))
+            for v, final in zip(staged, stale):
+                os.replace(v.out_path, final.out_path)
+        finally:
+            for v in staged:
+                if os.path.exists(v.out_path):
+                    os.remove(v.out_path)
+        if cache is not None:
+            for v in stale:
+                cache.record(v.out_path, v.key, background=v.src_bg)
+
+    rendered = {v.out_path for v in stale}
+    return [RenderResult(v.out_path, skipped=v.out_path not in rendered, encoder=v.job.encoder) for v in variants]
+
+def render_variants(jobs, video_path: str, out_dir: str, pool=None, cache=None,
+                    on_progress=None, index=None) -> list:
+    """Render one clip in several layouts from a single decode; returns a RenderResult per job.
+
+    pool (a pool.RenderPool) makes the job cancellable, sets encoder threads and,
+    with a log_dir, keeps a log of the clip's ffmpeg runs;
+    cache (a cache.RenderCache) skips outputs that are already up to date (unless it forces)
+    and records the ones it renders;
+    on_progress receives progress.ProgressParser snapshots while ffmpeg runs;
+    index (a probe.MediaIndex) answers ffprobe questions for clips it already knows.
+
+    Encoders this ffmpeg doesn't have are replaced by encoders.FALLBACK up front;
+    if a hardware encoder fails, the clip is rendered again with FALLBACK.
+    Jobs with segments > 1 cut clips of SEGMENT_MIN_SECONDS or more per part
+    into keyframe-aligned parts encoded in parallel (see _encode_segmented).
+    A job's max_mb becomes the video bitrate that fits that clip (size_bitrate);
+    encoders that can are then run twice, a stats pass and the real one.
+    """
+    if pool is not None:
+        jobs = [job if job.threads else job.with_threads(pool.threads) for job in jobs]
+    requested = [encoders.lookup(job.encoder).name for job in jobs]
+    jobs = [replace(job, encoder=encoders.usable(job.encoder)) for job in jobs]
+    wants_probe = on_progress is not None or any(job.smart_copy or job.segments > 1 or job.max_mb for job in jobs)
+    if not wants_probe:
+        info = {}
+    else:
+        info = index.get(video_path) if index is not None else probe_media(video_path)
+    pool = pool if pool is not None else RenderPool(1)
+
+    with pool.logged(log_name(video_path)) as runner:
+        try:
+            results = _render_prepared(jobs, video_path, out_dir, runner, cache, on_progress, info)
+        except FFmpegError:
+            hardware = {job.encoder for job in jobs if encoders.lookup(job.encoder).hardware}
+            if not hardware:
+                raise
+            cpu_jobs = [replace(job, encoder=encoders.FALLBACK) if job.encoder in hardware else job for job in jobs]
+            results = _render_prepared(cpu_jobs, video_path, out_dir, runner, cache, on_progress, info)
+            # Only now is it certain the encoder, not the clip, was the problem
+            for name in hardware:
+                encoders.mark_broken(name)
+    return [r._replace(fallback=r.encoder != name) for r, name in zip(results, requested)]
+
+def log_name(video_path: str) -> str:
+    """<clip>-<hash of its full path>, so same-named clips from different folders keep separate logs."""
+    key = hashlib.blake2b(os.path.abspath(video_path).encode("utf-8"), digest_size=4).hexdigest()
+    return f"{os.path.basename(video_path)}-{key}"
+
+def render_one(job: RenderJob, video_path: str, out_dir: str, pool=None, cache=None,
+               on_progress=None, index=None) -> RenderResult:
+    """Render one clip with one layout (see render_variants)."""
+    return render_variants([job], video_path, out_dir, pool, cache, on_progress, index)[0]
@@ -0,0 +1,110 @@
+"""Resource limits for the ffmpeg processes a RenderPool starts.
+
+Rendering often shares the machine with downloads and desktop use:
+
+  max_cores   cores all render jobs together may use; each concurrent job is
+              pinned to its own share of them and gets that many encoder threads
+  nice        CPU priority, 0 (normal) to 19 (only idle time)
+  ionice      disk priority: "idle" or "low" (best-effort, lowest level)
+  memory_mb   heap ceiling per ffmpeg process (RLIMIT_DATA)
+
+Defaults come from EDITVIDEO_MAX_CORES, EDITVIDEO_NICE, EDITVIDEO_IONICE and
+EDITVIDEO_MEMORY_MB, so every GUI and the CLIs use the same budget; batch
+manifests can override them under "limits". The budget is taken from the
+highest-numbered cores, leaving core 0 and up to everything else.
+
+ffmpeg is started through prlimit, taskset, ionice and nice (util-linux and
+coreutils), so the limits hold before ffmpeg creates its first thread. A limit
+whose tool isn't installed is skipped.
+"""
+import functools, os, shutil, threading
+from contextlib import contextmanager
+from typing import NamedTuple
+
+IONICE_ARGS = {"idle": ["-c", "3"], "low": ["-c", "2", "-n", "7"]}
+
+class Limits(NamedTuple):
+    max_cores: int = 0   # 0 = every core this process may use
+    nice: int = 0
+    ionice: str = ""     # "" | idle | low
+    memory_mb: int = 0   # 0 = no ceiling
+
+    @classmethod
+    def from_env(cls) -> "Limits":
+        env = os.environ.get
+        try:
+            return cls(int(env("EDITVIDEO_MAX_CORES") or 0), int(env("EDITVIDEO_NICE") or 0),
+                       env("EDITVIDEO_IONICE") or "", int(env("EDITVIDEO_MEMORY_MB") or 0)).checked()
+        except ValueError as e:
+            raise ValueError(f"EDITVIDEO_* resource limits: {e}")
+
+    def checked(self) -> "Limits":
+        if self.max_cores < 0 or self.memory_mb < 0:
+            raise ValueError("max_cores and memory_mb can't be negative")
+        if not 0 <= self.nice <= 19:
+            raise ValueError("nice must be between 0 and 19")
+        if self.ionice and self.ionice not in IONICE_ARGS:
+            raise ValueError(f"ionice must be one of {', '.join(IONICE_ARGS)}")
+        return self
+
+def allowed_cores() -> list:
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:  # not Linux
+        return list(range(os.cpu_count() or 1))
+
+def budget(limits: Limits) -> list:
+    """The cores render jobs may use."""
+    cores = allowed_cores()
+    return cores[-limits.max_cores:] if limits.max_cores else cores
+
+def core_sets(cores, workers: int) -> list:
+    """Split cores into one contiguous set per worker (workers share cores when there are more workers)."""
+    n = len(cores)
+    if workers >= n:
+        return [[cores[i % n]] for i in range(workers)]
+    return [cores[i * n // workers:(i + 1) * n // workers] for i in range(workers)]
+
+@functools.lru_cache(maxsize=None)
+def _tool(name: str):
+    return shutil.which(name)
+
+class Governor:
+    """Hands each ffmpeg run the command prefix that applies the limits, on the least busy core set."""
+
+    def __init__(self, limits: Limits, workers: int):
+        self.limits = limits
+        self.cores = budget(limits)
+        self._sets = core_sets(self.cores, workers) if limits.max_cores and _tool("taskset") else []
+        self._busy = [0] * len(self._sets)
+        self._lock = threading.Lock()
+
+    def _prefix(self, cores) -> list:
+        limits, prefix = self.limits, []
+        if limits.memory_mb and _tool("prlimit"):
+            prefix += [_tool("prlimit"), f"--data={limits.memory_mb * 1024 * 1024}", "--"]
+        if cores:
+            prefix += [_tool("taskset"), "-c", ",".join(map(str, cores))]
+        if limits.ionice and _tool("ionice"):
+            prefix += [_tool("ionice"), *IONICE_ARGS[limits.ionice]]
+        if limits.nice and _tool("nice"):
+            prefix += [_tool("nice"), "-n", str(limits.nice)]
+        return prefix
+
+    @contextmanager
+    def slot(self):
+        """Prefix for one ffmpeg command; its core set counts as busy until the block exits.
+
+        Runs beyond `workers` (segment pieces) share the least busy set rather than wait.
+        """
+        if not self._sets:
+            yield self._prefix(None)
+            return
+        with self._lock:
+            k = min(range(len(self._sets)), key=self._busy.__getitem__)
+            self._busy[k] += 1
+        try:
+            yield self._prefix(self._sets[k])
+        finally:
+            with self._lock:
+                self._busy[k] -= 1
@@ -0,0 +1,84 @@
+"""Batch journal: which inputs of an interrupted batch are already finished.
+
+The journal (.batch_journal.json in the output folder) is tied to one batch,
+meaning the same settings and the same inputs. Run that batch again after
+a crash or a Stop and the finished inputs are passed over, unless the input
+file has changed since (size or mtime) or an output is gone. The file is
+deleted once every input is done. Changing the settings or the input list
+starts a new journal.
+"""
+import hashlib, json, os, threading
+from dataclasses import asdict
+
+JOURNAL_NAME = ".batch_journal.json"
+
+def _stat_sig(path: str):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+def batch_id(jobs, inputs) -> str:
+    # threads only changes scheduling, not what the batch produces
+    spec = [{k: v for k, v in asdict(job).items() if k != "threads"} for job in jobs]
+    ident = json.dumps([spec, sorted(os.path.abspath(p) for p in inputs)], sort_keys=True)
+    return hashlib.blake2b(ident.encode("utf-8"), digest_size=16).hexdigest()
+
+class BatchJournal:
+    def __init__(self, out_dir: str, jobs, inputs):
+        self.path = os.path.join(out_dir, JOURNAL_NAME)
+        self.batch = batch_id(jobs, inputs)
+        self._inputs = {os.path.abspath(p) for p in inputs}
+        self._lock = threading.Lock()
+        self._done = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("batch") == self.batch:
+                self._done = dict(data.get("done", {}))
+        except (OSError, ValueError):
+            pass
+
+    def finished(self, path: str):
+        """Outputs recorded for path if it finished earlier, is unchanged and they still exist, else None."""
+        with self._lock:
+            entry = self._done.get(os.path.abspath(path))
+        if not isinstance(entry, dict) or not entry.get("outputs"):
+            return None
+        try:
+            if _stat_sig(path) != entry.get("input"):
+                return None
+        except OSError:
+            return None
+        outputs = entry["outputs"]
+        if all(os.path.isfile(o) for o in outputs):
+            return outputs
+        return None
+
+    def mark_done(self, path: str, outputs):
+        entry = {"input": _stat_sig(path), "outputs": [os.path.abspath(o) for o in outputs]}
+        with self._lock:
+            self._done[os.path.abspath(path)] = entry
+            self._save()
+
+    def close(self):
+        """Forget the batch if every input finished; otherwise keep it for the next run."""
+        with self._lock:
+            complete = self._inputs <= self._done.keys()
+        if complete:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def discard(self):
+        with self._lock:
+            self._done = {}
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"batch": self.batch, "done": self._done}, f, indent=1)
+        os.replace(tmp, self.path)
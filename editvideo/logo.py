@@ -1,20 +1,13 @@
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, colorchooser
-import os, random, subprocess, threading
+from tkinter import ttk, filedialog, messagebox
+import os
 
-IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
-VIDEO_EXTS = (".mp4", ".mov", ".avi", ".mkv")
+from batchui import BatchWindow
+from engine import IMAGE_EXTS, RenderJob, ffmpeg_exists
 
 TIKTOK_W, TIKTOK_H = 720, 1200
 
-def ffmpeg_exists() -> bool:
-    try:
-        subprocess.run(["ffmpeg", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-        return True
-    except Exception:
-        return False
-
-class TikTokVideoCreator(tk.Tk):
+class TikTokVideoCreator(BatchWindow):
     def __init__(self):
         super().__init__()
         self.title("FFmpeg TikTok Video Creator")
@@ -38,15 +31,7 @@ class TikTokVideoCreator(tk.Tk):
         ttk.Button(self, text="Browse", command=self._choose_video_folder).grid(row=1, column=4, sticky="w", padx=(0,8))
 
         # ===== File Table =====
-        cols = ("no", "title", "size", "status")
-        self.tree = ttk.Treeview(self, columns=cols, show="headings", height=13)
-        for c in cols:
-            self.tree.heading(c, text=c.capitalize())
-        self.tree.column("no", width=40, anchor="center")
-        self.tree.column("title", width=560, anchor="w")
-        self.tree.column("size", width=100, anchor="e")
-        self.tree.column("status", width=150, anchor="w")
-        self.tree.grid(row=2, column=0, columnspan=5, sticky="nsew", padx=8, pady=8)
+        self._file_table().grid(row=2, column=0, columnspan=5, sticky="nsew", padx=8, pady=8)
 
         # ===== Output Folder =====
         ttk.Label(self, text="Output Folder:").grid(row=3, column=0, sticky="w", padx=8)
@@ -56,13 +41,10 @@ class TikTokVideoCreator(tk.Tk):
 
         # ===== Render Selection =====
         ttk.Label(self, text="Render:").grid(row=4, column=0, sticky="w", padx=8, pady=6)
-        self.render_var = tk.StringVar(value="CPU")
-        ttk.Combobox(self, textvariable=self.render_var, values=["CPU", "GPU"], width=8, state="readonly")\
-            .grid(row=4, column=1, sticky="w")
+        self._render_controls(self).grid(row=4, column=1, sticky="w")
 
         # ===== Create Button =====
-        self.create_btn = ttk.Button(self, text="Create TikTok Videos", command=self._run_batch)
-        self.create_btn.grid(row=6, column=0, columnspan=5, pady=14)
+        self._run_controls(self).grid(row=6, column=0, columnspan=5, pady=14)
 
         self.columnconfigure(3, weight=1)
         self.rowconfigure(2, weight=1)
@@ -97,72 +79,12 @@ class TikTokVideoCreator(tk.Tk):
         if folder:
             self.output_folder_var.set(folder)
 
-    def _load_videos(self, folder):
-        self.tree.delete(*self.tree.get_children())
-        files = [f for f in os.listdir(folder) if f.lower().endswith(VIDEO_EXTS)]
-        for i, f in enumerate(sorted(files), start=1):
-            size_mb = os.path.getsize(os.path.join(folder, f)) / (1200 * 900.0)
-            self.tree.insert("", "end", iid=f, values=(i, f, f"{size_mb:.2f} MB", "Ready"))
-
-    def _pick_random_background(self):
-        folder = self.bg_path_var.get()
-        if not os.path.isdir(folder):
-            return None
-        candidates = [os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTS)]
-        return random.choice(candidates) if candidates else None
-
-    def _build_ffmpeg_cmd(self, in_video: str, bg_img: str, out_path: str):
-        canvas_w, canvas_h = TIKTOK_W, TIKTOK_H
-        max_video_h = int(canvas_h * 0.8)  # 1080
-
-        # Background scaled and cropped
-        bg_branch = f"[1]scale={canvas_w}:{canvas_h}:force_original_aspect_ratio=increase," \
-                    f"crop={canvas_w}:{canvas_h}[bg]"
-
-        # Video scaled to 720 width, max 1080 height, centered
-        video_branch = f"[0]scale=w={canvas_w}:h={max_video_h}:force_original_aspect_ratio=decrease," \
-                       f"pad={canvas_w}:{canvas_h}:(ow-iw)/2:(oh-ih)/2:color=0x00000000[v]"
-
-        combine = "[bg][v]overlay=shortest=1[outv]"
-        filter_complex = f"{bg_branch};{video_branch};{combine}"
-
-        if self.render_var.get().upper() == "GPU":
-            vcodec = ["-c:v", "h264_nvenc", "-preset", "p5", "-b:v", "5M"]
-        else:
-            vcodec = ["-c:v", "libx264", "-crf", "20", "-preset", "veryfast"]
-
-        cmd = [
-            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
-            "-i", in_video,
-            "-loop", "1", "-i", bg_img,
-            "-filter_complex", filter_complex,
-            "-map", "[outv]", "-map", "0:a?",
-            *vcodec,
-            "-c:a", "aac", "-b:a", "128k",
-            "-movflags", "+faststart",
-            out_path
-        ]
-        return cmd
-
-    def _process_one(self, video_path: str, out_dir: str):
-        if self.bg_mode.get() == "choose":
-            bg_img = self.bg_path_var.get()
-            if not os.path.isfile(bg_img):
-                raise RuntimeError("Invalid background image path.")
-        else:
-            bg_img = self._pick_random_background()
-            if not bg_img:
-                raise RuntimeError("No image found in background folder.")
-
-        base = os.path.splitext(os.path.basename(video_path))[0]
-        out_path = os.path.join(out_dir, base + "_tiktok.mp4")
-
-        cmd = self._build_ffmpeg_cmd(video_path, bg_img, out_path)
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-
-        if result.returncode != 0:
-            raise RuntimeError(result.stderr.strip() or "FFmpeg failed.")
-        return out_path
+    def _job_spec(self) -> RenderJob:
+        return RenderJob(
+            layout="logo", canvas_w=TIKTOK_W, canvas_h=TIKTOK_H,
+            bg_mode=self.bg_mode.get(), bg_path=self.bg_path_var.get(),
+            encoder=self.encoder_var.get(), quality=self.quality_var.get(), max_mb=self.max_mb_var.get(),
+        )
 
     def _run_batch(self):
         if not ffmpeg_exists():
@@ -179,29 +101,7 @@ class TikTokVideoCreator(tk.Tk):
             messagebox.showerror("Output Error", "Invalid output folder.")
             return
 
-        self.create_btn.config(state="disabled")
-        for child in self.tree.get_children():
-            self.tree.set(child, "status", "Queued")
-
-        def worker():
-            try:
-                files = [f for f in os.listdir(in_dir) if f.lower().endswith(VIDEO_EXTS)]
-                if not files:
-                    messagebox.showwarning("No Videos", "No video files found.")
-                    return
-                for fname in sorted(files):
-                    path = os.path.join(in_dir, fname)
-                    self.tree.set(fname, "status", "Processing…")
-                    try:
-                        out_file = self._process_one(path, out_dir)
-                        self.tree.set(fname, "status", f"Done → {os.path.basename(out_file)}")
-                    except Exception as e:
-                        self.tree.set(fname, "status", f"Error: {e}")
-                messagebox.showinfo("Completed", "All videos processed.")
-            finally:
-                self.create_btn.config(state="normal")
-
-        threading.Thread(target=worker, daemon=True).start()
+        self._start_batch(in_dir, out_dir)
 
 if __name__ == "__main__":
     app = TikTokVideoCreator()
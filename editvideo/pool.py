@@ -0,0 +1,214 @@
+import json, os, subprocess, threading, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from governor import Governor, Limits, budget
+from progress import ProgressParser
+
+def cpu_count() -> int:
+    return os.cpu_count() or 1
+
+def default_workers(limits: Limits | None = None) -> int:
+    """One concurrent ffmpeg job per 4 cores of the render budget (x264 stops scaling well past that)."""
+    return max(1, len(budget(limits or Limits.from_env())) // 4)
+
+def threads_per_job(workers: int, cores: int | None = None) -> int:
+    """Split the machine (or `cores` of it) evenly between the concurrent x264 encoders."""
+    return max(1, (cores or cpu_count()) // max(1, workers))
+
+def longest_first(items, cost):
+    """Order items by descending cost(item) so the big jobs don't end up running alone.
+
+    Items with unknown cost (None) go first: they may be the longest of all.
+    """
+    items = list(items)
+    known = sorted((i for i in items if cost(i) is not None), key=cost, reverse=True)
+    unknown = [i for i in items if cost(i) is None]
+    return unknown + known
+
+TAIL_LINES = 200       # stderr lines kept per ffmpeg run for the error message
+LOG_DIR_NAME = ".logs"  # per-clip logs, inside the output folder
+
+class RenderCancelled(RuntimeError):
+    pass
+
+class JobLog:
+    """JSON-lines log of every ffmpeg run for one clip, written as it happens.
+
+    Events: start (cmd), stderr (line), progress (ProgressParser snapshot), exit (returncode).
+    The file is only created (and an older one replaced) by the first event, so a
+    clip the render cache skips keeps the log of the run that made its output.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def write(self, event: str, **fields):
+        line = json.dumps({"t": round(time.time(), 3), "event": event, **fields}, ensure_ascii=False)
+        with self._lock:
+            if self._closed:
+                return
+            if self._f is None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._f = open(self.path, "w", encoding="utf-8", buffering=1)
+            self._f.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            if self._f is not None:
+                self._f.close()
+
+class _LoggedRunner:
+    def __init__(self, pool, log):
+        self._pool = pool
+        self._log = log
+
+    def run(self, cmd, on_progress=None, duration=None):
+        return self._pool.run(cmd, on_progress, duration, log=self._log)
+
+class RenderPool:
+    """Bounded pool of concurrent ffmpeg jobs that can be cancelled mid-batch.
+
+    limits (a governor.Limits, default from the environment) pins, deprioritises
+    and memory-caps every ffmpeg it starts.
+    """
+
+    def __init__(self, workers: int | None = None, log_dir: str | None = None, limits: Limits | None = None):
+        limits = limits or Limits.from_env()
+        self.workers = max(1, int(workers or default_workers(limits)))
+        self.log_dir = log_dir
+        self.governor = Governor(limits, self.workers)
+        self.threads = threads_per_job(self.workers, len(self.governor.cores))
+        self._cancel = threading.Event()
+        self._procs = set()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+        with self._lock:
+            procs = list(self._procs)
+        for proc in procs:
+            try:
+                proc.kill()
+            except OSError:
+                pass
+
+    def run(self, cmd, on_progress=None, duration=None, log=None):
+        """Like subprocess.run(cmd) with stderr captured, but cancel() can kill it.
+
+        Only the last TAIL_LINES lines of stderr are kept (returned as .stderr),
+        however much ffmpeg writes; log (a JobLog) gets all of it as it arrives.
+        With on_progress, ffmpeg reports through -progress pipe:1 and on_progress gets a
+        progress.ProgressParser snapshot for every update (duration enables percent/ETA).
+        """
+        if self.cancelled:
+            raise RenderCancelled("Cancelled")
+        if on_progress is not None:
+            cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+        with self.governor.slot() as prefix:
+            if log is not None:
+                log.write("start", cmd=cmd, **({"wrapper": prefix} if prefix else {}))
+            started = time.monotonic()
+            proc = subprocess.Popen(prefix + cmd, stdout=subprocess.PIPE if on_progress else subprocess.DEVNULL,
+                                    stderr=subprocess.PIPE, text=True, errors="replace")
+            with self._lock:
+                self._procs.add(proc)
+            try:
+                parser = ProgressParser(duration) if on_progress is not None else None
+                tail = self._follow(proc, parser, on_progress, log)
+            finally:
+                with self._lock:
+                    self._procs.discard(proc)
+        if log is not None:
+            log.write("exit", returncode=proc.returncode, seconds=round(time.monotonic() - started, 3),
+                      cancelled=self.cancelled)
+        if self.cancelled:
+            raise RenderCancelled("Cancelled")
+        return subprocess.CompletedProcess(cmd, proc.returncode, "", "".join(tail))
+
+    @contextmanager
+    def logged(self, name: str):
+        """A runner whose run() also logs to log_dir/<name>.jsonl (just this pool without log_dir)."""
+        if not self.log_dir:
+            yield self
+            return
+        log = JobLog(os.path.join(self.log_dir, name + ".jsonl"))
+        try:
+            yield _LoggedRunner(self, log)
+        finally:
+            log.close()
+
+    @staticmethod
+    def _follow(proc, parser, on_progress, log):
+        tail = deque(maxlen=TAIL_LINES)
+
+        def drain():
+            for line in proc.stderr:
+                tail.append(line)
+                if log is not None:
+                    log.write("stderr", line=line.rstrip("\n"))
+
+        if parser is None:
+            drain()
+        else:
+            # stderr is drained on the side so a chatty ffmpeg can't block on a full pipe
+            reader = threading.Thread(target=drain, daemon=True)
+            reader.start()
+            for line in proc.stdout:
+                snap = parser.feed(line)
+                if snap is not None:
+                    if log is not None:
+                        log.write("progress", **snap)
+                    on_progress(snap)
+            reader.join()
+        proc.wait()
+        return tail
+
+    def _task(self, item, fn, on_start, on_done, on_error):
+        if self.cancelled:
+            if on_error:
+                on_error(item, RenderCancelled("Cancelled"))
+            return
+        if on_start:
+            on_start(item)
+        try:
+            result = fn(item)
+        except Exception as e:
+            if on_error:
+                on_error(item, e)
+        else:
+            if on_done:
+                on_done(item, result)
+
+    def map(self, items, fn, on_start=None, on_done=None, on_error=None):
+        """Run fn(item) for every item with at most `workers` in flight; blocks until all finish.
+
+        Items start in the given order (see longest_first).
+        Items still queued when the pool is cancelled are reported to on_error with RenderCancelled.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as ex:
+            for future in [ex.submit(self._task, item, fn, on_start, on_done, on_error) for item in items]:
+                future.result()
+
+    def submit(self, item, fn, on_start=None, on_done=None, on_error=None):
+        """Queue fn(item) without waiting, for callers that keep adding work (watch.py); see shutdown()."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            return self._executor.submit(self._task, item, fn, on_start, on_done, on_error)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,107 @@
+"""Preview window shared by the editvideo GUIs (frames from engine.render_preview)."""
+import tkinter as tk
+from tkinter import ttk
+import os, shutil, tempfile, threading, time
+
+from engine import render_preview
+
+EXCERPT_SECONDS = 3.0
+EXCERPT_FPS = 5
+
+class PreviewWindow(tk.Toplevel):
+    """Three stills or a short looping excerpt of one clip with the current settings.
+
+    get_job is called on every refresh, so the window follows the main window's settings.
+    """
+
+    def __init__(self, master, get_job, video_path: str, index=None):
+        super().__init__(master)
+        self.title(f"Preview – {os.path.basename(video_path)}")
+        self._get_job = get_job
+        self._video = video_path
+        self._index = index
+        self._dir = tempfile.mkdtemp(prefix="editvideo-preview-")
+        self._generation = 0
+        self._images = []
+        self._anim = None
+
+        bar = ttk.Frame(self)
+        bar.grid(row=0, column=0, sticky="w", padx=8, pady=6)
+        self.mode = tk.StringVar(value="stills")
+        ttk.Radiobutton(bar, text="Stills", value="stills", variable=self.mode, command=self.refresh)\
+            .grid(row=0, column=0, sticky="w")
+        ttk.Radiobutton(bar, text=f"{EXCERPT_SECONDS:g} s clip", value="excerpt", variable=self.mode,
+                        command=self.refresh).grid(row=0, column=1, sticky="w", padx=(8, 0))
+        ttk.Button(bar, text="Refresh", command=self.refresh).grid(row=0, column=2, sticky="w", padx=(16, 0))
+        self.status_var = tk.StringVar()
+        ttk.Label(bar, textvariable=self.status_var).grid(row=0, column=3, sticky="w", padx=(16, 0))
+
+        self.frames = ttk.Frame(self)
+        self.frames.grid(row=1, column=0, padx=8, pady=(0, 8))
+        self.protocol("WM_DELETE_WINDOW", self._close)
+        self.refresh()
+
+    def refresh(self):
+        try:
+            job = self._get_job()
+        except (tk.TclError, ValueError) as e:
+            self.status_var.set(f"Invalid settings: {e}")
+            return
+        self._generation += 1
+        generation = self._generation
+        excerpt = EXCERPT_SECONDS if self.mode.get() == "excerpt" else 0.0
+        out_dir = os.path.join(self._dir, str(generation))
+        self.status_var.set("Rendering preview…")
+
+        def worker():
+            t0 = time.monotonic()
+            try:
+                info = self._index.get(self._video) if self._index is not None else None
+                paths = render_preview(job, self._video, out_dir, excerpt, EXCERPT_FPS, info=info)
+                done = (self._show, generation, paths, excerpt > 0, time.monotonic() - t0)
+            except Exception as e:
+                done = (self._failed, generation, e)
+            try:
+                self.after(0, *done)
+            except (RuntimeError, tk.TclError):
+                pass  # window closed meanwhile
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _failed(self, generation, e):
+        if generation == self._generation:
+            self.status_var.set(f"Error: {e}")
+
+    def _show(self, generation, paths, animate, seconds):
+        if generation != self._generation or not self.winfo_exists():
+            return  # a newer refresh is on its way, or the window was closed
+        self._stop_animation()
+        for child in self.frames.winfo_children():
+            child.destroy()
+        self._images = [tk.PhotoImage(file=p) for p in paths]
+        if animate and self._images:
+            label = ttk.Label(self.frames, image=self._images[0])
+            label.grid(row=0, column=0)
+            self._animate(label, 0)
+        else:
+            for i, img in enumerate(self._images):
+                ttk.Label(self.frames, image=img).grid(row=0, column=i, padx=4)
+        self.status_var.set(f"Rendered in {seconds:.1f} s")
+        # Earlier previews are no longer displayed
+        for name in os.listdir(self._dir):
+            if name != str(generation):
+                shutil.rmtree(os.path.join(self._dir, name), ignore_errors=True)
+
+    def _animate(self, label, i):
+        label.configure(image=self._images[i])
+        self._anim = self.after(1000 // EXCERPT_FPS, self._animate, label, (i + 1) % len(self._images))
+
+    def _stop_animation(self):
+        if self._anim is not None:
+            self.after_cancel(self._anim)
+            self._anim = None
+
+    def _close(self):
+        self._stop_animation()
+        self.destroy()
+        shutil.rmtree(self._dir, ignore_errors=True)
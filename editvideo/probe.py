@@ -0,0 +1,180 @@
+"""ffprobe helpers: what a clip contains before ffmpeg touches it."""
+import json, os, subprocess, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from bgcache import CACHE_DIR
+from progress import format_eta
+
+# AAC at these rates/layouts can go into the mp4 output untouched
+COPY_AUDIO_RATES = (44100, 48000)
+COPY_AUDIO_CHANNELS = (1, 2)
+
+LOCK_STALE_SECONDS = 30   # a lock file this old was left by a process that died mid-save
+
+def _rate(value):
+    num, _, den = (value or "").partition("/")
+    try:
+        return round(float(num) / float(den or 1), 3)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+def _number(value, kind=float):
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return None
+
+def probe_media(path: str) -> dict:
+    """Duration, first video and first audio stream of `path`; {} if ffprobe fails.
+
+    Keys: duration, width, height, vcodec, pix_fmt, fps, acodec, sample_rate, channels.
+    """
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error",
+             "-show_entries",
+             "format=duration:stream=codec_type,codec_name,width,height,pix_fmt,"
+             "avg_frame_rate,sample_rate,channels",
+             "-of", "json", path],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True,
+        ).stdout
+        data = json.loads(out)
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return {}
+
+    info = {"duration": _number(data.get("format", {}).get("duration"))}
+    for s in data.get("streams", []):
+        if s.get("codec_type") == "video" and "vcodec" not in info:
+            info.update(vcodec=s.get("codec_name"), width=_number(s.get("width"), int),
+                        height=_number(s.get("height"), int), pix_fmt=s.get("pix_fmt"),
+                        fps=_rate(s.get("avg_frame_rate")))
+        elif s.get("codec_type") == "audio" and "acodec" not in info:
+            info.update(acodec=s.get("codec_name"), sample_rate=_number(s.get("sample_rate"), int),
+                        channels=_number(s.get("channels"), int))
+    return info
+
+def audio_copyable(info: dict) -> bool:
+    return (info.get("acodec") == "aac"
+            and info.get("sample_rate") in COPY_AUDIO_RATES
+            and info.get("channels") in COPY_AUDIO_CHANNELS)
+
+@contextmanager
+def _file_lock(path: str):
+    """Hold `path` as a lock file, shared by every process (Windows included)."""
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > LOCK_STALE_SECONDS:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(path)
+
+def _load(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+class MediaIndex:
+    """Persistent probe_media() results keyed by path, invalidated by size/mtime.
+
+    Shared by every GUI and the CLI through CACHE_DIR/media_index.json, so a
+    folder is only probed again for clips that changed. save() merges what this
+    process probed into the file under a lock, so processes saving at the same
+    time don't drop each other's entries.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(CACHE_DIR, "media_index.json")
+        self._lock = threading.Lock()
+        self._entries = _load(self.path)
+        self._probed = set()  # keys probed here since the last save
+
+    def cached(self, path: str):
+        """Known info for path if it hasn't changed since it was probed, else None."""
+        key = os.path.abspath(path)
+        try:
+            st = os.stat(key)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry["sig"] == [st.st_size, st.st_mtime_ns]:
+            return entry["info"]
+        return None
+
+    def _probe(self, path: str) -> dict:
+        info = self.cached(path)
+        if info is not None:
+            return info
+        key = os.path.abspath(path)
+        st = os.stat(key)
+        info = probe_media(key)
+        if info:  # don't remember failures; the file may still be downloading
+            with self._lock:
+                self._entries[key] = {"sig": [st.st_size, st.st_mtime_ns], "info": info}
+                self._probed.add(key)
+        return info
+
+    def get(self, path: str) -> dict:
+        known = self.cached(path)
+        if known is not None:
+            return known
+        info = self._probe(path)
+        self.save()
+        return info
+
+    def probe_all(self, paths, workers: int = 8) -> dict:
+        """Probe every path, unknown ones in parallel; returns {path: info}."""
+        paths = list(paths)
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            infos = list(ex.map(self._probe, paths))
+        self.save()
+        return dict(zip(paths, infos))
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock:
+            if not self._probed:
+                return
+            with _file_lock(self.path + ".lock"):
+                entries = _load(self.path)
+                entries.update((key, self._entries[key]) for key in self._probed)
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(entries, f)
+                os.replace(tmp, self.path)
+            self._entries, self._probed = entries, set()
+
+def estimate_cost(info: dict, by: str = "cost"):
+    """Relative render cost for scheduling, None when the clip couldn't be probed.
+
+    "duration" ranks by length alone; "cost" by frames x source pixels, which
+    is what decode and scaling work grows with.
+    """
+    duration = info.get("duration")
+    if not duration:
+        return None
+    if by == "duration":
+        return duration
+    pixels = (info.get("width") or 1920) * (info.get("height") or 1080)
+    return duration * (info.get("fps") or 30) * pixels
+
+def describe(info: dict):
+    """(duration, resolution, codec) strings for display."""
+    d = info.get("duration")
+    duration = format_eta(d) if d is not None else "?"
+    res = f"{info['width']}x{info['height']}" if info.get("width") else "?"
+    return duration, res, info.get("vcodec") or "?"
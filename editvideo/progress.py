@@ -0,0 +1,155 @@
+"""Live ffmpeg progress (-progress pipe:1) and per-file / per-batch ETA."""
+import threading, time
+
+def format_eta(seconds) -> str:
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
+
+def _float(value):
+    try:
+        return float(value.rstrip("x").replace("kbits/s", ""))
+    except (AttributeError, ValueError):
+        return None
+
+class ProgressParser:
+    """Turns ffmpeg's key=value progress blocks into one snapshot dict per block.
+
+    Snapshot keys: frame, fps, speed (x realtime), bitrate (kbit/s), out_time (s),
+    duration, percent, eta (s) and done. Unknown values are None.
+    """
+
+    def __init__(self, duration=None):
+        self.duration = duration
+        self._block = {}
+
+    def feed(self, line: str):
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            return None
+        if key != "progress":
+            self._block[key] = value
+            return None
+        block, self._block = self._block, {}
+        return self._snapshot(block, done=(value == "end"))
+
+    def _snapshot(self, block, done):
+        us = _float(block.get("out_time_us") or block.get("out_time_ms"))
+        out_time = max(0.0, us / 1e6) if us is not None else None
+        speed = _float(block.get("speed"))
+        frame = _float(block.get("frame"))
+        snap = {
+            "frame": int(frame) if frame is not None else None,
+            "fps": _float(block.get("fps")),
+            "speed": speed,
+            "bitrate": _float(block.get("bitrate")),
+            "out_time": out_time,
+            "duration": self.duration,
+            "percent": None,
+            "eta": None,
+            "done": done,
+        }
+        if done:
+            snap["percent"], snap["eta"] = 100.0, 0.0
+        elif self.duration and out_time is not None:
+            snap["percent"] = min(100.0, 100.0 * out_time / self.duration)
+            if speed:
+                snap["eta"] = max(0.0, (self.duration - out_time) / speed)
+        return snap
+
+class CombinedProgress:
+    """One progress stream for a clip whose parts are encoded side by side (engine segments)."""
+
+    def __init__(self, duration, on_progress, parts: int):
+        self.duration = duration
+        self._on_progress = on_progress
+        self._lock = threading.Lock()
+        self._snaps = [{} for _ in range(parts)]
+
+    def part(self, k: int):
+        def update(snap):
+            with self._lock:
+                self._snaps[k] = snap
+                merged = self._merge()
+            self._on_progress(merged)
+        return update
+
+    def _merge(self):
+        running = [s for s in self._snaps if not s.get("done")]
+        out_time = sum(s.get("out_time") or 0.0 for s in self._snaps)
+        speed = sum(s.get("speed") or 0.0 for s in running)
+        done = not running
+        snap = {
+            "frame": sum(s.get("frame") or 0 for s in self._snaps),
+            "fps": sum(s.get("fps") or 0.0 for s in running) or None,
+            "speed": speed or None,
+            "bitrate": None,
+            "out_time": out_time,
+            "duration": self.duration,
+            "percent": 100.0 if done else None,
+            "eta": 0.0 if done else None,
+            "done": done,
+        }
+        if not done and self.duration:
+            snap["percent"] = min(100.0, 100.0 * out_time / self.duration)
+            if speed:
+                snap["eta"] = max(0.0, (self.duration - out_time) / speed)
+        return snap
+
+def format_progress(snap) -> str:
+    parts = []
+    if snap.get("percent") is not None:
+        parts.append(f"{snap['percent']:.0f}%")
+    if snap.get("fps"):
+        parts.append(f"{snap['fps']:.0f} fps")
+    if snap.get("speed"):
+        parts.append(f"{snap['speed']:.2f}x")
+    parts.append(f"ETA {format_eta(snap.get('eta'))}")
+    return " · ".join(parts)
+
+class BatchProgress:
+    """Whole-batch ETA from media seconds encoded so far vs. media seconds left.
+
+    Clips whose duration isn't known yet count as the mean of the known ones.
+    """
+
+    def __init__(self, names, durations=None):
+        """durations: {name: seconds} already known (e.g. from probe.MediaIndex)."""
+        durations = durations or {}
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._duration = {n: durations.get(n) for n in names}
+        self._encoded = {n: 0.0 for n in names}
+
+    def update(self, name, snap):
+        with self._lock:
+            if name not in self._duration:
+                return
+            if snap.get("duration"):
+                self._duration[name] = snap["duration"]
+            if snap.get("done"):
+                self._encoded[name] = self._duration[name] or self._encoded[name]
+            elif snap.get("out_time") is not None:
+                self._encoded[name] = snap["out_time"]
+
+    def drop(self, name):
+        """Leave a skipped or failed clip out of the estimate."""
+        with self._lock:
+            self._duration.pop(name, None)
+            self._encoded.pop(name, None)
+
+    def eta(self):
+        with self._lock:
+            known = [d for d in self._duration.values() if d]
+            if not known:
+                return None
+            mean = sum(known) / len(known)
+            total = sum(d or mean for d in self._duration.values())
+            encoded = sum(self._encoded.values())
+            elapsed = time.monotonic() - self._started
+        if encoded <= 0 or elapsed <= 0:
+            return None
+        return max(0.0, (total - encoded) / (encoded / elapsed))
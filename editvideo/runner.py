@@ -0,0 +1,96 @@
+"""One batch of clips through render_variants, run the same way by the GUIs, batch.py and watch.py."""
+import time
+
+from engine import RenderResult, render_variants
+from pool import longest_first
+from probe import MediaIndex, estimate_cost
+from progress import BatchProgress
+
+SCHEDULES = ("cost", "duration", "name")
+
+class BatchRunner:
+    """Renders clips with every job in `jobs` on `pool`, reporting through callbacks.
+
+    Clips are probed through the MediaIndex up front, which feeds the
+    whole-batch ETA (eta()) and the queue order. With a journal (see
+    journal.py), clips an interrupted run of the same batch already finished
+    are passed over. The callbacks are called on pool threads:
+
+      on_start(path)
+      on_progress(path, snap)           a progress.ProgressParser snapshot
+      on_done(path, results, seconds)   a RenderResult per job; skipped=True if up to date
+      on_error(path, exc)               RenderCancelled for clips stopped before they finished
+    """
+
+    def __init__(self, jobs, out_dir: str, pool, cache=None, index=None, journal=None,
+                 on_start=None, on_progress=None, on_done=None, on_error=None):
+        self.jobs = list(jobs)
+        self.out_dir = out_dir
+        self.pool = pool
+        self.cache = cache
+        self.index = index if index is not None else MediaIndex()
+        self.journal = journal
+        self.infos = {}  # path -> probe_media() result, for the clips given to run()
+        self._on_start, self._on_progress = on_start, on_progress
+        self._on_done, self._on_error = on_done, on_error
+        self._batch = BatchProgress([])
+        self._started = {}
+
+    def eta(self):
+        """Seconds until the clips given to run() are all rendered, None until there's a rate to go by."""
+        return self._batch.eta()
+
+    def run(self, files, schedule: str = "cost"):
+        """Render `files` and block until all are done.
+
+        schedule is the queue order: "cost" (frames x source pixels, biggest
+        first), "duration" (longest first) or "name" (as given). Biggest first
+        keeps a long encode from being left running alone at the end.
+        """
+        files = list(files)
+        self.infos = self.index.probe_all(files)
+        self._batch = BatchProgress(files, {p: self.infos[p].get("duration") for p in files})
+        if schedule in ("cost", "duration"):
+            files = longest_first(files, lambda p: estimate_cost(self.infos[p], schedule))
+        try:
+            self.pool.map(files, self._render, on_start=self._start, on_done=self._done, on_error=self._error)
+        finally:
+            if self.journal is not None:
+                self.journal.close()
+
+    def submit(self, path: str):
+        """Queue one more clip without waiting, for callers that keep adding work (watch.py)."""
+        return self.pool.submit(path, self._render, on_start=self._start, on_done=self._done, on_error=self._error)
+
+    def _render(self, path):
+        outputs = self.journal.finished(path) if self.journal is not None else None
+        if outputs:
+            return [RenderResult(o, skipped=True) for o in outputs]
+        results = render_variants(self.jobs, path, self.out_dir, self.pool, self.cache,
+                                  on_progress=lambda snap: self._progress(path, snap), index=self.index)
+        if self.journal is not None:
+            self.journal.mark_done(path, [r.output for r in results])
+        return results
+
+    def _start(self, path):
+        self._started[path] = time.monotonic()
+        if self._on_start:
+            self._on_start(path)
+
+    def _progress(self, path, snap):
+        self._batch.update(path, snap)
+        if self._on_progress:
+            self._on_progress(path, snap)
+
+    def _done(self, path, results):
+        if all(r.skipped for r in results):
+            self._batch.drop(path)
+        seconds = round(time.monotonic() - self._started.pop(path), 2)
+        if self._on_done:
+            self._on_done(path, results, seconds)
+
+    def _error(self, path, e):
+        self._batch.drop(path)
+        self._started.pop(path, None)
+        if self._on_error:
+            self._on_error(path, e)
@@ -1,29 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, colorchooser
-import os, random, shutil, subprocess, threading
+import os
 
-IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
-VIDEO_EXTS = (".mp4", ".mov", ".avi", ".mkv")
+from batchui import BatchWindow
+from engine import IMAGE_EXTS, RenderJob, ffmpeg_exists
 
 TIKTOK_W, TIKTOK_H = 435, 735
 
-def ffmpeg_exists() -> bool:
-    try:
-        subprocess.run(["ffmpeg", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-        return True
-    except Exception:
-        return False
-
-def to_ffmpeg_color(hex_color: str) -> str:
-    """Convert '#rrggbb' to '0xRRGGBB' for ffmpeg."""
-    if not hex_color:
-        return "0x000000"
-    h = hex_color.strip().lstrip("#")
-    if len(h) == 3:  # short form #rgb
-        h = "".join(ch * 2 for ch in h)
-    return "0x" + h.upper()
-
-class TikTokVideoCreator(tk.Tk):
+class TikTokVideoCreator(BatchWindow):
     def __init__(self):
         super().__init__()
         self.title("FFmpeg TikTok Video Creator")
@@ -47,15 +31,7 @@ class TikTokVideoCreator(tk.Tk):
         ttk.Button(self, text="Browse", command=self._choose_video_folder).grid(row=1, column=4, sticky="w", padx=(0,8))
 
         # ===== File Table =====
-        cols = ("no", "title", "size", "status")
-        self.tree = ttk.Treeview(self, columns=cols, show="headings", height=13)
-        for c in cols:
-            self.tree.heading(c, text=c.capitalize())
-        self.tree.column("no", width=40, anchor="center")
-        self.tree.column("title", width=560, anchor="w")
-        self.tree.column("size", width=100, anchor="e")
-        self.tree.column("status", width=150, anchor="w")
-        self.tree.grid(row=2, column=0, columnspan=5, sticky="nsew", padx=8, pady=8)
+        self._file_table().grid(row=2, column=0, columnspan=5, sticky="nsew", padx=8, pady=8)
 
         # ===== Output Folder =====
         ttk.Label(self, text="Output Folder:").grid(row=3, column=0, sticky="w", padx=8)
@@ -93,9 +69,7 @@ class TikTokVideoCreator(tk.Tk):
         # ===== Render / Foreground Opacity / Border =====
         row6 = 6
         ttk.Label(self, text="Render:").grid(row=row6, column=0, sticky="w", padx=8, pady=6)
-        self.render_var = tk.StringVar(value="CPU")
-        ttk.Combobox(self, textvariable=self.render_var, values=["CPU", "GPU"], width=8, state="readonly")\
-            .grid(row=row6, column=1, sticky="w")
+        self._render_controls(self).grid(row=row6, column=1, sticky="w")
 
         overlay_frame = ttk.Frame(self)
         overlay_frame.grid(row=row6, column=2, columnspan=3, sticky="w")
@@ -115,8 +89,7 @@ class TikTokVideoCreator(tk.Tk):
         ttk.Button(self, text="Pick", command=self._pick_color).grid(row=7, column=3, sticky="w")
 
         # ===== Create Button =====
-        self.create_btn = ttk.Button(self, text="Create TikTok Videos", command=self._run_batch)
-        self.create_btn.grid(row=8, column=0, columnspan=5, pady=14)
+        self._run_controls(self).grid(row=8, column=0, columnspan=5, pady=14)
 
         # ===== Layout stretch =====
         self.columnconfigure(3, weight=1)
@@ -167,113 +140,19 @@ class TikTokVideoCreator(tk.Tk):
         if color:
             self.border_color.set(color)
 
-    def _load_videos(self, folder):
-        self.tree.delete(*self.tree.get_children())
-        files = [f for f in os.listdir(folder) if f.lower().endswith(VIDEO_EXTS)]
-        for i, f in enumerate(sorted(files), start=1):
-            size_mb = os.path.getsize(os.path.join(folder, f)) / (1024 * 1024.0)
-            self.tree.insert("", "end", iid=f, values=(i, f, f"{size_mb:.2f} MB", "Ready"))
-
     # ---------- Processing ----------
-    def _pick_random_background(self):
-        folder = self.bg_path_var.get()
-        if not os.path.isdir(folder):
-            return None
-        candidates = [os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTS)]
-        return random.choice(candidates) if candidates else None
-
-    def _build_ffmpeg_cmd(self, in_video: str, bg_img: str, out_path: str):
-        # Video branch: scale to TikTok portrait, no distortion (scale up then crop)
-        video_branch = (
-            f"[0]scale={TIKTOK_W}:{TIKTOK_H}:force_original_aspect_ratio=increase,"
-            f"crop={TIKTOK_W}:{TIKTOK_H}[bg]"
+    def _job_spec(self) -> RenderJob:
+        return RenderJob(
+            layout="snack", canvas_w=TIKTOK_W, canvas_h=TIKTOK_H,
+            bg_mode=self.bg_mode.get(), bg_path=self.bg_path_var.get(),
+            border=self.set_border_var.get(), border_size=self.border_size.get(),
+            border_color=self.border_color.get(),
+            logo_path=self.logo_path_var.get() if self.logo_enabled.get() else "",
+            logo_x=self.logo_x.get(), logo_y=self.logo_y.get(), logo_size=self.logo_size.get(),
+            opacity=float(self.fg_opacity.get()),
+            encoder=self.encoder_var.get(), quality=self.quality_var.get(), max_mb=self.max_mb_var.get(),
         )
 
-        # Foreground image branch: scale to TikTok dimensions
-        if self.set_border_var.get():
-            bs = max(1, int(self.border_size.get()))
-            inner_w = max(2, TIKTOK_W - 2 * bs)
-            inner_h = max(2, TIKTOK_H - 2 * bs)
-            color = to_ffmpeg_color(self.border_color.get())
-            fg_branch = (
-                f"[1]scale={inner_w}:{inner_h}:force_original_aspect_ratio=decrease,"
-                f"pad={TIKTOK_W}:{TIKTOK_H}:(ow-iw)/2:(oh-ih)/2:color={color}[fg]"
-            )
-        else:
-            fg_branch = (
-                f"[1]scale={TIKTOK_W}:{TIKTOK_H}:force_original_aspect_ratio=decrease[fg]"
-            )
-
-        # Apply transparency to the foreground image
-        opacity = max(0.0, min(1.0, float(self.fg_opacity.get())))
-        if opacity < 1.0:
-            fg_branch = f"{fg_branch};[fg]format=rgba,colorchannelmixer=aa={opacity}[fg]"
-
-        # Logo branch (if enabled)
-        logo_filter = ""
-        logo_map = ""
-        if self.logo_enabled.get() and self.logo_path_var.get() and os.path.isfile(self.logo_path_var.get()):
-            logo_size = max(10, min(self.logo_size.get(), 300))  # Limit logo size
-            logo_x = max(0, min(self.logo_x.get(), TIKTOK_W - logo_size))
-            logo_y = max(0, min(self.logo_y.get(), TIKTOK_H - logo_size))
-            logo_filter = f";[2]scale={logo_size}:-1:force_original_aspect_ratio=decrease[logo]"
-            logo_map = "-map 2"
-            combine = (
-                f"[bg][fg]overlay=0:0:shortest=1[tmp];"
-                f"[tmp][logo]overlay={logo_x}:{logo_y}:format=yuv420p[outv]"
-            )
-        else:
-            combine = f"[bg][fg]overlay=0:0:shortest=1,format=yuv420p[outv]"
-
-        filter_complex = f"{video_branch};{fg_branch}{logo_filter};{combine}"
-
-        # Encoder selection
-        if self.render_var.get().upper() == "GPU":
-            vcodec = ["-c:v", "h264_nvenc", "-preset", "p5", "-b:v", "5M"]
-        else:
-            vcodec = ["-c:v", "libx264", "-crf", "20", "-preset", "veryfast"]
-
-        # Build command
-        cmd = [
-            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
-            "-i", in_video,
-            "-loop", "1", "-i", bg_img,
-        ]
-        
-        if self.logo_enabled.get() and self.logo_path_var.get() and os.path.isfile(self.logo_path_var.get()):
-            cmd.extend(["-i", self.logo_path_var.get()])
-            
-        cmd.extend([
-            "-filter_complex", filter_complex,
-            "-map", "[outv]", "-map", "0:a?",
-            *vcodec,
-            "-c:a", "aac", "-b:a", "128k",
-            "-movflags", "+faststart",
-            out_path
-        ])
-        
-        return cmd
-
-    def _process_one(self, video_path: str, out_dir: str):
-        if self.bg_mode.get() == "choose":
-            bg_img = self.bg_path_var.get()
-            if not os.path.isfile(bg_img):
-                raise RuntimeError("Invalid foreground image path.")
-        else:
-            bg_img = self._pick_random_background()
-            if not bg_img:
-                raise RuntimeError("No image found in the selected foreground folder.")
-
-        base = os.path.splitext(os.path.basename(video_path))[0]
-        out_path = os.path.join(out_dir, base + "_tiktok.mp4")
-
-        cmd = self._build_ffmpeg_cmd(video_path, bg_img, out_path)
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-
-        if result.returncode != 0:
-            raise RuntimeError(result.stderr.strip() or "FFmpeg failed.")
-        return out_path
-
     def _run_batch(self):
         if not ffmpeg_exists():
             messagebox.showerror("FFmpeg not found", "Install FFmpeg and ensure it is on your PATH.")
@@ -300,30 +179,7 @@ class TikTokVideoCreator(tk.Tk):
             messagebox.showerror("Opacity Error", "Invalid opacity value. Use a number between 0.0 and 1.0.")
             return
 
-        self.create_btn.config(state="disabled")
-        for child in self.tree.get_children():
-            self.tree.set(child, "status", "Queued")
-
-        def worker():
-            try:
-                files = [f for f in os.listdir(in_dir) if f.lower().endswith(VIDEO_EXTS)]
-                total = len(files)
-                if total == 0:
-                    messagebox.showwarning("No Videos", "No video files found in the selected folder.")
-                    return
-                for idx, fname in enumerate(sorted(files), start=1):
-                    path = os.path.join(in_dir, fname)
-                    self.tree.set(fname, "status", "Processing…")
-                    try:
-                        out_file = self._process_one(path, out_dir)
-                        self.tree.set(fname, "status", f"Done → {os.path.basename(out_file)}")
-                    except Exception as e:
-                        self.tree.set(fname, "status", f"Error: {e}")
-                messagebox.showinfo("Finished", "All tasks completed.")
-            finally:
-                self.create_btn.config(state="normal")
-
-        threading.Thread(target=worker, daemon=True).start()
+        self._start_batch(in_dir, out_dir)
 
 if __name__ == "__main__":
     app = TikTokVideoCreator()
@@ -0,0 +1,50 @@
+import subprocess
+
+from cache import RenderCache
+from engine import RenderJob, _render_prepared
+
+class FakeRunner:
+    """Stands in for ffmpeg: writes the output file named last on the command line."""
+
+    def __init__(self):
+        self.runs = 0
+
+    def run(self, cmd, on_progress=None, duration=None):
+        self.runs += 1
+        with open(cmd[-1], "w") as f:
+            f.write(f"render {self.runs}")
+        return subprocess.CompletedProcess(cmd, 0, "", "")
+
+JOB = RenderJob(layout="backgr", bg_mode="white", prescale_bg=False, smart_copy=False, static_plates=False)
+
+def _clip(tmp_path):
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(b"frames")
+    return str(clip)
+
+def test_fresh_only_while_output_and_key_match(tmp_path):
+    out = tmp_path / "out.mp4"
+    out.write_bytes(b"video")
+    cache = RenderCache(str(tmp_path))
+    cache.record(str(out), "k1")
+    assert cache.is_fresh(str(out), "k1")
+    assert not cache.is_fresh(str(out), "k2")
+    assert RenderCache(str(tmp_path)).is_fresh(str(out), "k1")  # survives a restart
+    out.write_bytes(b"edited by hand")
+    assert not cache.is_fresh(str(out), "k1")
+
+def test_unchanged_clip_is_skipped(tmp_path):
+    clip, runner = _clip(tmp_path), FakeRunner()
+    first = _render_prepared([JOB], clip, str(tmp_path), runner, RenderCache(str(tmp_path)), None, {})
+    again = _render_prepared([JOB], clip, str(tmp_path), runner, RenderCache(str(tmp_path)), None, {})
+    assert not first[0].skipped and again[0].skipped
+    assert runner.runs == 1
+
+def test_forced_render_is_recorded(tmp_path):
+    clip, runner = _clip(tmp_path), FakeRunner()
+    _render_prepared([JOB], clip, str(tmp_path), runner, RenderCache(str(tmp_path)), None, {})
+    forced = _render_prepared([JOB], clip, str(tmp_path), runner, RenderCache(str(tmp_path), force=True), None, {})
+    assert not forced[0].skipped and runner.runs == 2
+    # The re-render changed the output's size and mtime; the next normal run must still find it fresh
+    again = _render_prepared([JOB], clip, str(tmp_path), runner, RenderCache(str(tmp_path)), None, {})
+    assert again[0].skipped and runner.runs == 2
@@ -0,0 +1,58 @@
+import subprocess
+
+import pytest
+
+import encoders
+
+ENCODERS_OUTPUT = """Encoders:
+ V..... = Video
+ A..... = Audio
+ ------
+ V....D libx264              libx264 H.264 / AVC / MPEG-4 AVC / MPEG-4 part 10 (codec h264)
+ V....D h264_nvenc           NVIDIA NVENC H.264 encoder (codec h264)
+ A....D aac                  AAC (Advanced Audio Coding)
+"""
+
+@pytest.fixture
+def ffmpeg_encoders(monkeypatch):
+    """Pretend the ffmpeg on PATH prints ENCODERS_OUTPUT, and forget encoders marked broken."""
+    def run(cmd, **kwargs):
+        return subprocess.CompletedProcess(cmd, 0, ENCODERS_OUTPUT, "")
+
+    monkeypatch.setattr(encoders.subprocess, "run", run)
+    monkeypatch.setattr(encoders, "_broken", set())
+    encoders.available.cache_clear()
+    yield
+    encoders.available.cache_clear()
+
+def test_available_lists_video_encoders_only(ffmpeg_encoders):
+    assert encoders.available() == {"libx264", "h264_nvenc"}
+    assert encoders.choices() == ["libx264", "h264_nvenc"]
+
+def test_missing_encoder_falls_back(ffmpeg_encoders):
+    assert encoders.usable("h264_nvenc") == "h264_nvenc"
+    assert encoders.usable("libx265") == encoders.FALLBACK
+
+def test_broken_encoder_falls_back(ffmpeg_encoders):
+    encoders.mark_broken("h264_nvenc")
+    assert encoders.usable("h264_nvenc") == encoders.FALLBACK
+
+def test_no_ffmpeg_trusts_the_requested_encoder(monkeypatch):
+    def run(cmd, **kwargs):
+        raise OSError("ffmpeg not found")
+
+    monkeypatch.setattr(encoders.subprocess, "run", run)
+    encoders.available.cache_clear()
+    try:
+        assert encoders.available() == frozenset()
+        assert encoders.choices() == [encoders.FALLBACK]
+        assert encoders.usable("libx265") == "libx265"
+    finally:
+        encoders.available.cache_clear()
+
+def test_lookup_aliases_and_unknown_names():
+    assert encoders.lookup("cpu").name == "libx264"
+    assert encoders.lookup("GPU").name == "h264_nvenc"
+    assert encoders.lookup("").name == encoders.FALLBACK
+    with pytest.raises(ValueError):
+        encoders.lookup("libvpx")
@@ -0,0 +1,48 @@
+import re
+
+import pytest
+
+from engine import LAYOUTS, RenderJob, _relabel, build_filter_complex
+
+def _check_pads(graph):
+    """Every pad a chain reads is an input or made by an earlier chain, and each chain's output is new."""
+    made = []
+    for chain in graph.split(";"):
+        for pad in re.findall(r"\w+", re.match(r"(?:\[\w+\])*", chain).group(0)):
+            assert pad.isdigit() or pad in made, pad
+        out = re.search(r"\[(\w+)\]$", chain).group(1)
+        assert out not in made
+        made.append(out)
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_every_layout_ends_in_outv(layout):
+    graph = build_filter_complex(RenderJob(layout=layout))
+    assert graph.endswith("[outv]")
+    _check_pads(graph)
+
+def test_logo_is_scaled_clamped_and_overlaid():
+    job = RenderJob(layout="edit", logo_size=1000, logo_x=5000, logo_y=-10)
+    graph = build_filter_complex(job, logo_input=2)
+    W, _ = job.size
+    assert "[2]scale=300:-1[logo]" in graph
+    assert f"[logo]overlay={W - 300}:0[withlogo]" in graph
+
+def test_plate_replaces_logo_and_text():
+    job = RenderJob(layout="backgr", logo_path="logo.png", text="hi")
+    graph = build_filter_complex(job, logo_input=None, plate_input=2)
+    assert "[base][2]overlay=0:0[plated]" in graph
+    assert "drawtext" not in graph and "[logo]" not in graph
+
+def test_text_is_escaped():
+    graph = build_filter_complex(RenderJob(layout="edit", text="it's 100%: ok"))
+    # A quote would end the value early; ':' and '%' must be escaped for drawtext
+    assert "drawtext=text='it\u2019s 100\\%\\: ok':" in graph
+
+def test_relabel_maps_inputs_and_suffixes_named_pads():
+    graph = "[0]scale=2:2[v];[1][v]overlay[base];[logoin]scale=9:-1[logo];[base][logo]overlay[outv]"
+    assert _relabel(graph, {"0": "src1", "1": "3", "logoin": "4"}, 1) == (
+        "[src1]scale=2:2[v1];[3][v1]overlay[base1];[4]scale=9:-1[logo1];[base1][logo1]overlay[outv1]")
+
+def test_relabel_leaves_unmapped_inputs_and_quoted_text_alone():
+    graph = "[2][v]overlay[x];[x]drawtext=text='[v] stays'[outv]"
+    assert _relabel(graph, {}, 0) == "[2][v0]overlay[x0];[x0]drawtext=text='[v] stays'[outv0]"
@@ -0,0 +1,25 @@
+import pytest
+
+from governor import Limits, core_sets
+
+def test_core_sets_split_cores_evenly():
+    assert core_sets([0, 1, 2, 3, 4, 5, 6, 7], 2) == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert core_sets([0, 1, 2, 3, 4, 5, 6], 3) == [[0, 1], [2, 3], [4, 5, 6]]
+    assert core_sets([4, 5, 6, 7], 1) == [[4, 5, 6, 7]]
+
+def test_more_workers_than_cores_share_them():
+    assert core_sets([2, 3], 5) == [[2], [3], [2], [3], [2]]
+
+def test_limits_from_env(monkeypatch):
+    monkeypatch.setenv("EDITVIDEO_MAX_CORES", "4")
+    monkeypatch.setenv("EDITVIDEO_NICE", "10")
+    monkeypatch.setenv("EDITVIDEO_IONICE", "idle")
+    monkeypatch.delenv("EDITVIDEO_MEMORY_MB", raising=False)
+    assert Limits.from_env() == Limits(4, 10, "idle", 0)
+
+@pytest.mark.parametrize("name, value", [("EDITVIDEO_NICE", "abc"), ("EDITVIDEO_NICE", "40"),
+                                         ("EDITVIDEO_IONICE", "fast"), ("EDITVIDEO_MAX_CORES", "-1")])
+def test_malformed_limits_are_refused(monkeypatch, name, value):
+    monkeypatch.setenv(name, value)
+    with pytest.raises(ValueError, match="EDITVIDEO_"):
+        Limits.from_env()
@@ -0,0 +1,55 @@
+import os
+
+from engine import RenderJob
+from journal import JOURNAL_NAME, BatchJournal, batch_id
+
+JOB = RenderJob(layout="fae", bg_mode="white")
+
+def _files(tmp_path, *names):
+    paths = []
+    for name in names:
+        (tmp_path / name).write_bytes(name.encode())
+        paths.append(str(tmp_path / name))
+    return paths
+
+def test_batch_id_ignores_threads_and_input_order(tmp_path):
+    a, b = _files(tmp_path, "a.mp4", "b.mp4")
+    assert batch_id([JOB], [a, b]) == batch_id([JOB.with_threads(8)], [b, a])
+    assert batch_id([JOB], [a, b]) != batch_id([JOB], [a])
+    assert batch_id([JOB], [a]) != batch_id([RenderJob(layout="edit", bg_mode="white")], [a])
+
+def test_finished_clip_is_passed_over_by_the_same_batch(tmp_path):
+    a, b, out = _files(tmp_path, "a.mp4", "b.mp4", "a_out.mp4")
+    BatchJournal(str(tmp_path), [JOB], [a, b]).mark_done(a, [out])
+    assert BatchJournal(str(tmp_path), [JOB], [a, b]).finished(a) == [out]
+    assert BatchJournal(str(tmp_path), [JOB], [a, b]).finished(b) is None
+    assert BatchJournal(str(tmp_path), [JOB], [a]).finished(a) is None  # another batch
+
+def test_changed_input_or_missing_output_is_rendered_again(tmp_path):
+    a, out = _files(tmp_path, "a.mp4", "a_out.mp4")
+    BatchJournal(str(tmp_path), [JOB], [a]).mark_done(a, [out])
+    with open(a, "ab") as f:
+        f.write(b"more")
+    assert BatchJournal(str(tmp_path), [JOB], [a]).finished(a) is None
+
+    BatchJournal(str(tmp_path), [JOB], [a]).mark_done(a, [out])
+    os.remove(out)
+    assert BatchJournal(str(tmp_path), [JOB], [a]).finished(a) is None
+
+def test_close_removes_the_journal_only_when_complete(tmp_path):
+    a, b, out = _files(tmp_path, "a.mp4", "b.mp4", "out.mp4")
+    journal = BatchJournal(str(tmp_path), [JOB], [a, b])
+    journal.mark_done(a, [out])
+    journal.close()
+    assert (tmp_path / JOURNAL_NAME).exists()
+    journal.mark_done(b, [out])
+    journal.close()
+    assert not (tmp_path / JOURNAL_NAME).exists()
+
+def test_discard_forgets_finished_clips(tmp_path):
+    a, out = _files(tmp_path, "a.mp4", "out.mp4")
+    BatchJournal(str(tmp_path), [JOB], [a]).mark_done(a, [out])
+    journal = BatchJournal(str(tmp_path), [JOB], [a])
+    journal.discard()
+    assert journal.finished(a) is None
+    assert not (tmp_path / JOURNAL_NAME).exists()
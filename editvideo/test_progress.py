@@ -0,0 +1,37 @@
+from progress import ProgressParser, format_eta
+
+def _feed(parser, text):
+    snaps = [parser.feed(line) for line in text.strip().splitlines()]
+    return [s for s in snaps if s is not None]
+
+def test_block_becomes_one_snapshot():
+    snaps = _feed(ProgressParser(duration=20.0), """
+        frame=150
+        fps=30.00
+        bitrate=1200.5kbits/s
+        out_time_us=5000000
+        speed=2.5x
+        progress=continue
+    """)
+    assert len(snaps) == 1
+    snap = snaps[0]
+    assert snap["frame"] == 150 and snap["fps"] == 30.0
+    assert snap["bitrate"] == 1200.5 and snap["speed"] == 2.5
+    assert snap["out_time"] == 5.0
+    assert snap["percent"] == 25.0
+    assert snap["eta"] == 6.0  # 15 s of media left at 2.5x
+    assert not snap["done"]
+
+def test_unknown_values_are_none():
+    snap = _feed(ProgressParser(), "fps=N/A\nspeed=N/A\nout_time_us=N/A\nprogress=continue")[0]
+    assert snap["fps"] is None and snap["speed"] is None and snap["out_time"] is None
+    assert snap["percent"] is None and snap["eta"] is None
+
+def test_end_block_is_done():
+    snap = _feed(ProgressParser(duration=20.0), "out_time_us=19000000\nprogress=end")[0]
+    assert snap["done"] and snap["percent"] == 100.0 and snap["eta"] == 0.0
+
+def test_format_eta():
+    assert format_eta(None) == "--:--"
+    assert format_eta(65) == "1:05"
+    assert format_eta(3725) == "1:02:05"
@@ -0,0 +1,220 @@
+"""Watch folders and render every clip that lands in them, with no one clicking Create.
+
+    python watch.py manifest.json [--workers N] [--settle SECONDS] [--poll SECONDS] [--new-only]
+
+The manifest is the same as for batch.py, except that "inputs" lists the
+folders to watch (not recursive). A clip is queued once its size and mtime
+have stayed the same for "settle_seconds" (default 5), so files still being
+downloaded or copied are left alone. On Linux inotify wakes the watcher as
+soon as a file is closed or moved in; elsewhere the folders are re-scanned
+every "poll_seconds" (default 2).
+
+Clips already in the folders at start-up are rendered too, unless --new-only;
+outputs that are up to date are skipped through the render cache, so
+restarting the watcher does not redo finished work. Runs until SIGINT/SIGTERM.
+Events are JSON lines, like batch.py.
+"""
+import argparse, ctypes, ctypes.util, os, select, signal, struct, sys, threading, time
+
+from batch import emit, jobs_from_manifest, limits_from_manifest, load_manifest
+from cache import RenderCache
+from engine import VIDEO_EXTS, ffmpeg_exists
+from pool import LOG_DIR_NAME, RenderPool, RenderCancelled
+from probe import MediaIndex
+from runner import BatchRunner
+
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+_EVENT = struct.Struct("iIII")
+
+class Inotify:
+    """Minimal inotify through libc; wait() returns True when something changed in the folders."""
+
+    def __init__(self, folders):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        for folder in folders:
+            if self._libc.inotify_add_watch(self.fd, os.fsencode(folder), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE) < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {folder}")
+
+    def wait(self, timeout: float) -> bool:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        # Drain everything queued; the watcher re-scans, so which files changed doesn't matter
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return True
+            if len(data) < _EVENT.size:
+                return True
+
+    def close(self):
+        os.close(self.fd)
+
+class Polling:
+    def __init__(self, folders):
+        pass
+
+    def wait(self, timeout: float) -> bool:
+        time.sleep(timeout)
+        return False
+
+    def close(self):
+        pass
+
+def open_notifier(folders):
+    if sys.platform.startswith("linux"):
+        try:
+            return Inotify(folders)
+        except (OSError, AttributeError):
+            pass  # no inotify (or out of watches): fall back to polling
+    return Polling(folders)
+
+class FolderWatcher:
+    """Reports video files in `folders` once they have stopped changing for `settle` seconds."""
+
+    def __init__(self, folders, settle: float = 5.0, exclude=()):
+        self.folders = list(folders)
+        self.settle = settle
+        self._exclude = {os.path.abspath(p) for p in exclude}
+        self._pending = {}   # path -> (size, mtime_ns, unchanged since)
+        self._reported = {}  # path -> (size, mtime_ns) last handed out
+
+    def _scan(self):
+        for folder in self.folders:
+            try:
+                entries = list(os.scandir(folder))
+            except OSError:
+                continue
+            for entry in entries:
+                name = entry.name
+                if name.startswith(".") or not name.lower().endswith(VIDEO_EXTS):
+                    continue
+                path = os.path.abspath(entry.path)
+                if path in self._exclude:
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                yield path, (st.st_size, st.st_mtime_ns)
+
+    def exclude(self, paths):
+        self._exclude.update(os.path.abspath(p) for p in paths)
+
+    def mark_seen(self):
+        """Treat everything already in the folders as handled (--new-only)."""
+        for path, sig in self._scan():
+            self._reported[path] = sig
+
+    def poll(self):
+        """Newly settled files, and the seconds until the next pending one might settle (None if none)."""
+        now = time.monotonic()
+        ready, seen = [], set()
+        for path, sig in self._scan():
+            seen.add(path)
+            if self._reported.get(path) == sig or sig[0] == 0:
+                continue
+            known = self._pending.get(path)
+            if known is None or known[:2] != sig:
+                self._pending[path] = (*sig, now)
+            elif now - known[2] >= self.settle:
+                del self._pending[path]
+                self._reported[path] = sig
+                ready.append(path)
+        for path in set(self._pending) - seen:  # deleted or renamed away before settling
+            del self._pending[path]
+        if not self._pending:
+            return sorted(ready), None
+        next_check = min(since + self.settle for _, _, since in self._pending.values()) - now
+        return sorted(ready), max(0.1, next_check)
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Render new clips from watched folders as they arrive.")
+    ap.add_argument("manifest", help="JSON or YAML job manifest; its inputs are the folders to watch")
+    ap.add_argument("--workers", type=int, help="parallel ffmpeg jobs (overrides the manifest)")
+    ap.add_argument("--settle", type=float, help="seconds a file must stay unchanged before it is rendered")
+    ap.add_argument("--poll", type=float, help="seconds between folder scans without inotify")
+    ap.add_argument("--new-only", action="store_true", help="ignore clips already in the folders at start-up")
+    args = ap.parse_args(argv)
+
+    try:
+        m = load_manifest(args.manifest)
+        base_dir = os.path.dirname(os.path.abspath(args.manifest))
+        jobs = jobs_from_manifest(m, base_dir)
+        folders = m.get("inputs") or []
+        folders = [os.path.join(base_dir, f) for f in ([folders] if isinstance(folders, str) else folders)]
+        if not folders or not all(os.path.isdir(f) for f in folders):
+            raise ValueError("'inputs' must list the folders to watch.")
+        out_dir = m.get("output_dir") or ""
+        if not out_dir:
+            raise ValueError("'output_dir' is required.")
+        out_dir = os.path.join(base_dir, out_dir)
+        settle = args.settle if args.settle is not None else float(m.get("settle_seconds", 5))
+        poll = args.poll if args.poll is not None else float(m.get("poll_seconds", 2))
+        limits = limits_from_manifest(m)
+    except (OSError, ValueError) as e:
+        emit({"event": "error", "error": f"{args.manifest}: {e}"})
+        return 2
+    if not ffmpeg_exists():
+        emit({"event": "error", "error": "FFmpeg not found on PATH."})
+        return 2
+    os.makedirs(out_dir, exist_ok=True)
+
+    pool = RenderPool(args.workers or m.get("workers"), log_dir=os.path.join(out_dir, LOG_DIR_NAME), limits=limits)
+    cache = RenderCache(out_dir, force=not m.get("skip_unchanged", True))
+    stop = threading.Event()
+
+    def shutdown(*_):
+        stop.set()
+        pool.cancel()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, shutdown)
+
+    # Outputs never count as inputs, even when output_dir is one of the watched folders
+    outputs = [j.output_path(os.path.join(f, n), out_dir) for j in jobs for f in folders for n in os.listdir(f)]
+    watcher = FolderWatcher(folders, settle, exclude=outputs)
+    if args.new_only:
+        watcher.mark_seen()
+    notifier = open_notifier(folders)
+
+    def on_done(path, results, seconds):
+        for r in results:
+            emit({"event": "skipped" if r.skipped else "done", "input": path, "output": r.output,
+                  "seconds": seconds, "encoder": r.encoder, "fallback": r.fallback})
+
+    def on_error(path, e):
+        emit({"event": "cancelled" if isinstance(e, RenderCancelled) else "error", "input": path, "error": str(e)})
+
+    runner = BatchRunner(jobs, out_dir, pool, cache, MediaIndex(), on_done=on_done, on_error=on_error)
+
+    emit({"event": "watching", "folders": folders, "output_dir": out_dir,
+          "notify": "inotify" if isinstance(notifier, Inotify) else "polling", "workers": pool.workers})
+    try:
+        while not stop.is_set():
+            ready, next_check = watcher.poll()
+            for path in ready:
+                watcher.exclude(j.output_path(path, out_dir) for j in jobs)
+                emit({"event": "queued", "input": path})
+                runner.submit(path)
+            timeout = poll if next_check is None else min(poll, next_check)
+            if isinstance(notifier, Inotify) and next_check is None:
+                timeout = max(poll, 60.0)  # inotify wakes us; the timeout is only a safety re-scan
+            notifier.wait(timeout)
+    finally:
+        notifier.close()
+        pool.shutdown(wait=True)
+        emit({"event": "stopped"})
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
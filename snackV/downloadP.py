@@ -1,81 +1,11 @@
-import os
-import re
-import threading
-import requests
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
-import yt_dlp
-
-# Global flag for stopping
-stop_flag = False
-
-
-# ====== Scraper: Get all video links from a SnackVideo profile ======
-def get_profile_videos(profile_url):
-    headers = {"User-Agent": "Mozilla/5.0"}
-    try:
-        r = requests.get(profile_url, headers=headers)
-        if r.status_code != 200:
-            return []
-        # Extract video URLs
-        links = re.findall(r'https://www\.snackvideo\.com/@[A-Za-z0-9._-]+/video/\d+', r.text)
-        return list(set(links))  # unique only
-    except Exception as e:
-        print("Scraper error:", e)
-        return []
-
-
-# ====== Downloader ======
-def download_video(url, folder, log_box):
-    ydl_opts = {
-        'outtmpl': os.path.join(folder, '%(title)s.%(ext)s'),
-        'format': 'best',
-        'quiet': True,
-        'no_warnings': True,
-    }
-    try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
-        log_box.insert(tk.END, f"✅ Downloaded: {url}\n")
-        log_box.see(tk.END)
-    except Exception as e:
-        log_box.insert(tk.END, f"❌ Error: {e}\n")
-        log_box.see(tk.END)
-
-
-def start_download(url, folder, log_box, all_videos=True, limit=None):
-    global stop_flag
-    stop_flag = False
-
-    def run():
-        nonlocal url, folder, log_box, all_videos, limit
 
-        if all_videos:
-            links = get_profile_videos(url)
-            if not links:
-                log_box.insert(tk.END, "❌ No videos found in profile.\n")
-                return
-            log_box.insert(tk.END, f"🔍 Found {len(links)} videos.\n")
-            count = 0
-            for link in links:
-                if stop_flag:
-                    log_box.insert(tk.END, "⏹ Download stopped by user.\n")
-                    break
-                if limit and count >= limit:
-                    break
-                download_video(link, folder, log_box)
-                count += 1
-        else:
-            download_video(url, folder, log_box)
-
-        log_box.insert(tk.END, "🎉 Completed!\n")
-
-    threading.Thread(target=run, daemon=True).start()
+from shared_downloader import DownloadJob, TkDownloads
 
 
 # ====== GUI ======
 def build_gui():
-    global stop_flag
     root = tk.Tk()
     root.title("SnackVideo Downloader KH")
     root.geometry("800x550")
@@ -112,6 +42,12 @@ def build_gui():
     log_box = scrolledtext.ScrolledText(root, width=95, height=18, bg="black", fg="white")
     log_box.pack(pady=10)
 
+    def log(line):
+        log_box.insert(tk.END, line + "\n")
+        log_box.see(tk.END)
+
+    downloads = TkDownloads(root, "downloadP", log)
+
     # Buttons
     button_frame = tk.Frame(root, bg="white")
     button_frame.pack()
@@ -123,15 +59,15 @@ def build_gui():
             messagebox.showerror("Error", "Please enter URL and select folder.")
             return
         try:
-            limit = int(limit_entry.get()) if limit_entry.get().strip() else None
+            limit = max(int(limit_entry.get()), 0) if limit_entry.get().strip() else 0
         except:
-            limit = None
-        log_box.insert(tk.END, f"🚀 Starting download...\n")
-        start_download(url, folder, log_box, all_videos.get(), limit)
+            limit = 0
+        log("🚀 Starting download...")
+        downloads.submit(DownloadJob(url, folder, limit=limit, single=not all_videos.get(), outtmpl="%(title)s.%(ext)s",
+                                     options={"format": "best"}))
 
     def stop():
-        global stop_flag
-        stop_flag = True
+        downloads.stop()
 
     def clear():
         log_box.delete("1.0", tk.END)
@@ -1,46 +1,10 @@
-import os
-import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
-import yt_dlp
-
-# Global stop flag
-stop_flag = False
-
-# Download single video
-def download_video(url, folder, log_box):
-    ydl_opts = {
-        'outtmpl': os.path.join(folder, '%(title)s.%(ext)s'),
-        'format': 'best',
-        'quiet': True,
-        'no_warnings': True,
-    }
-    try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
-        log_box.insert(tk.END, f"✅ Downloaded: {url}\n")
-    except Exception as e:
-        log_box.insert(tk.END, f"❌ Error: {e}\n")
-    log_box.see(tk.END)
-
-# Start download in thread
-def start_download(url, folder, log_box):
-    global stop_flag
-    stop_flag = False
-
-    def run():
-        if stop_flag:
-            log_box.insert(tk.END, "⏹ Download stopped.\n")
-            return
-        download_video(url, folder, log_box)
-        log_box.insert(tk.END, "🎉 Completed!\n")
 
-    threading.Thread(target=run, daemon=True).start()
+from shared_downloader import DownloadJob, TkDownloads
 
 # GUI
 def build_gui():
-    global stop_flag
-
     root = tk.Tk()
     root.title("SnackVideo Single Downloader")
     root.geometry("700x450")
@@ -64,6 +28,12 @@ def build_gui():
     log_box = scrolledtext.ScrolledText(root, width=85, height=15, bg="black", fg="white")
     log_box.pack(pady=10)
 
+    def log(line):
+        log_box.insert(tk.END, line + "\n")
+        log_box.see(tk.END)
+
+    downloads = TkDownloads(root, "news", log)
+
     # Buttons
     button_frame = tk.Frame(root, bg="white")
     button_frame.pack()
@@ -74,12 +44,11 @@ def build_gui():
         if not url or not folder:
             messagebox.showerror("Error", "Please enter URL and select folder.")
             return
-        log_box.insert(tk.END, "🚀 Starting download...\n")
-        start_download(url, folder, log_box)
+        log("🚀 Starting download...")
+        downloads.submit(DownloadJob(url, folder, single=True, outtmpl="%(title)s.%(ext)s", options={"format": "best"}))
 
     def stop():
-        global stop_flag
-        stop_flag = True
+        downloads.stop()
 
     def clear():
         log_box.delete("1.0", tk.END)
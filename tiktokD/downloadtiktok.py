@@ -1,10 +1,9 @@
-import os
 import re
-import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from tkinter import ttk
-import yt_dlp
+
+from shared_downloader import DownloadJob, TkDownloads
 
 APP_TITLE = "Kimly Tool KH — TikTok Profile Downloader"
 
@@ -29,8 +28,6 @@ class TikTokProfileDownloader(tk.Tk):
         self.geometry("900x560")
         self.minsize(880, 520)
 
-        self.stop_flag = False
-        self.completed = 0
         self.download_folder = ""
 
         # --- Header ---
@@ -96,6 +93,9 @@ class TikTokProfileDownloader(tk.Tk):
         tk.Label(footer, text="Copyright © 2025 - All rights reserved",
                  fg="white", bg="#0d6efd", font=("Segoe UI", 10)).pack(side="right", padx=16)
 
+        self.downloads = TkDownloads(self, "downloadtiktok", self.log_line, progress=self.progress,
+                                     completed=self.lbl_completed, button=self.btn_download)
+
     # --- UI helpers ---
     def choose_folder(self):
         folder = filedialog.askdirectory()
@@ -113,12 +113,10 @@ class TikTokProfileDownloader(tk.Tk):
 
     def clear_log(self):
         self.log.delete("1.0", "end")
-        self.completed = 0
-        self.lbl_completed.config(text=f"Completed [{self.completed}]")
-        self.progress["value"] = 0
+        self.downloads.reset()
 
     def stop_download(self):
-        self.stop_flag = True
+        self.downloads.stop()
         self.log_line("⛔ Stopping…")
 
     # --- Download logic ---
@@ -132,7 +130,7 @@ class TikTokProfileDownloader(tk.Tk):
             return
 
         # Count
-        count = None
+        count = 0
         if not self.var_all.get():
             try:
                 c = int(self.count_entry.get())
@@ -144,78 +142,12 @@ class TikTokProfileDownloader(tk.Tk):
                 return
 
         self.clear_log()
-        self.stop_flag = False
         self.btn_download.config(state="disabled")
-        t = threading.Thread(target=self._download_thread, args=(url, count), daemon=True)
-        t.start()
-
-    def _download_thread(self, profile_url: str, count: int | None):
-        self.log_line(f"🔗 Profile: {profile_url}")
-        self.log_line("📥 Preparing…")
-
-        # yt-dlp options:
-        # - TikTok: yt-dlp retrieves the *no-watermark* play URLs automatically.
-        # - Pass the profile URL directly; it's treated as a playlist of that user's posts.
-        ydl_opts = {
-            "outtmpl": os.path.join(self.download_folder, "%(uploader)s_%(id)s.%(ext)s"),
+        # TikTok: yt-dlp retrieves the *no-watermark* play URLs automatically.
+        self.downloads.submit(DownloadJob(url, self.download_folder, limit=count, options={
             "merge_output_format": "mp4",
-            "ignoreerrors": True,
-            "continuedl": True,
-            "retries": 5,
-            "fragment_retries": 5,
-            "quiet": True,
-            "no_warnings": True,
-            "noplaylist": False,
             "concurrent_fragment_downloads": 3,
-            "progress_hooks": [self._progress_hook],
-        }
-
-        # Limit how many from the playlist
-        if count is not None:
-            ydl_opts["playlistend"] = count
-
-        try:
-            # First pass to know playlist length (for progress bar max)
-            with yt_dlp.YoutubeDL({"quiet": True, "extract_flat": "in_playlist"}) as probe:
-                info = probe.extract_info(profile_url, download=False)
-            entries = info.get("entries") or []
-            total = len(entries) if count is None else min(len(entries), count)
-            if total == 0:
-                self.log_line("⚠️ No videos found.")
-                self.btn_download.config(state="normal")
-                return
-
-            self.progress["maximum"] = total
-            self.progress["value"] = 0
-            self.log_line(f"Found {total} video(s). Starting download…")
-
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([profile_url])
-
-            if not self.stop_flag:
-                self.log_line("✅ All done.")
-        except Exception as e:
-            self.log_line(f"❌ Error: {e}")
-        finally:
-            self.btn_download.config(state="normal")
-
-    def _progress_hook(self, d):
-        # Called for each fragment and at 'finished'
-        if self.stop_flag:
-            raise KeyboardInterrupt("Stopped by user")
-
-        if d.get("status") == "finished":
-            self.completed += 1
-            self.lbl_completed.config(text=f"Completed [{self.completed}]")
-            self.progress["value"] = self.completed
-            self.log_line(f"⬇️ Saved: {os.path.basename(d.get('filename',''))}")
-        elif d.get("status") == "downloading":
-            # Optional: live per-file speed/ETA in the status bar
-            eta = d.get("_eta_str") or ""
-            speed = d.get("_speed_str") or ""
-            total = d.get("_total_bytes_str") or d.get("_total_bytes_estimate_str") or ""
-            downloaded = d.get("_downloaded_bytes_str") or ""
-            self.log_line(f"… {downloaded}/{total} {speed} ETA {eta}")
+        }))
 
 if __name__ == "__main__":
     app = TikTokProfileDownloader()
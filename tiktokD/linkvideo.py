@@ -1,13 +1,13 @@
 import os
 import re
-import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from tkinter import ttk
-import traceback
-import yt_dlp
+
+from shared_downloader import DEFAULT_PER_HOST, DEFAULT_WORKERS, DownloadJob, TkDownloads
 
 APP_TITLE = "Kimly Tool KH — TikTok Downloader"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
 
 def clean_profile_url(url: str) -> str:
     url = url.strip()
@@ -27,10 +27,9 @@ class TikTokDownloader(tk.Tk):
         self.geometry("900x600")
         self.minsize(880, 560)
 
-        self.stop_flag = False
-        self.completed = 0
         self.download_folder = ""
         self.cookies_file = ""
+        self.failed = []  # errors of the videos that failed since Download was pressed
 
         # --- Header ---
         header = tk.Frame(self, bg="#0d6efd", height=48)
@@ -78,6 +77,12 @@ class TikTokDownloader(tk.Tk):
         self.count_entry.insert(0, "10")
         self.count_entry.pack(side="left")
         self.toggle_count()
+        tk.Label(opt_row, text="Parallel:").pack(side="left", padx=(18, 6))
+        self.parallel_var = tk.IntVar(value=DEFAULT_WORKERS)
+        tk.Spinbox(opt_row, from_=1, to=16, width=4, textvariable=self.parallel_var).pack(side="left")
+        tk.Label(opt_row, text="Per host:").pack(side="left", padx=(12, 6))
+        self.per_host_var = tk.IntVar(value=DEFAULT_PER_HOST)
+        tk.Spinbox(opt_row, from_=1, to=16, width=4, textvariable=self.per_host_var).pack(side="left")
 
         # Buttons
         btn_row = tk.Frame(content)
@@ -110,6 +115,10 @@ class TikTokDownloader(tk.Tk):
         tk.Label(footer, text="Copyright © 2025 - All rights reserved",
                  fg="white", bg="#0d6efd", font=("Segoe UI", 10)).pack(side="right", padx=16)
 
+        self.downloads = TkDownloads(self, "linkvideo", self.log_line, progress=self.progress,
+                                     completed=self.lbl_completed, button=self.btn_download,
+                                     on_event=self._on_event)
+
     # --- Helpers ---
     def choose_folder(self):
         folder = filedialog.askdirectory()
@@ -133,12 +142,11 @@ class TikTokDownloader(tk.Tk):
 
     def clear_log(self):
         self.log.delete("1.0", "end")
-        self.completed = 0
-        self.lbl_completed.config(text=f"Completed [{self.completed}]")
-        self.progress["value"] = 0
+        self.downloads.reset()
+        self.failed = []
 
     def stop_download(self):
-        self.stop_flag = True
+        self.downloads.stop()
         self.log_line("⛔ Stopping…")
 
     # --- Main download entry ---
@@ -158,130 +166,56 @@ class TikTokDownloader(tk.Tk):
             messagebox.showerror("Error", "Please choose a download folder.")
             return
 
+        count = 0
+        if not video_url and not self.var_all.get():
+            try:
+                c = int(self.count_entry.get())
+                if c <= 0:
+                    raise ValueError
+                count = c
+            except Exception:
+                messagebox.showerror("Error", "Download count must be a positive number.")
+                return
+        try:
+            parallel, per_host = self.parallel_var.get(), self.per_host_var.get()
+            if parallel <= 0 or per_host <= 0:
+                raise ValueError
+        except (tk.TclError, ValueError):
+            messagebox.showerror("Error", "Parallel and Per host must be positive numbers.")
+            return
+
         self.clear_log()
-        self.stop_flag = False
         self.btn_download.config(state="disabled")
-
-        if video_url:
-            threading.Thread(target=self._download_single, args=(video_url,), daemon=True).start()
-        else:
-            count = None
-            if not self.var_all.get():
-                try:
-                    c = int(self.count_entry.get())
-                    if c <= 0:
-                        raise ValueError
-                    count = c
-                except Exception:
-                    messagebox.showerror("Error", "Download count must be a positive number.")
-                    self.btn_download.config(state="normal")
-                    return
-            threading.Thread(target=self._download_profile, args=(profile_url, count), daemon=True).start()
-
-    # --- Download one video ---
-    def _download_single(self, video_url: str):
-        self.log_line(f"🔗 Video: {video_url}")
-        ydl_opts = {
-            "outtmpl": os.path.join(self.download_folder, "%(uploader)s_%(id)s.%(ext)s"),
+        options = {
             "merge_output_format": "mp4",
-            "quiet": True,
-            "no_warnings": True,
-            "progress_hooks": [self._progress_hook],
-            "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+            "user_agent": USER_AGENT,
             "extractor_args": {"tiktok": {"impersonate": [""]}}, # Disable internal auto-impersonation to avoid 403
             # "impersonate": "chrome120",
         }
         if self.cookies_file:
             self.log_line(f"🍪 Using cookies: {os.path.basename(self.cookies_file)}")
-            ydl_opts["cookiefile"] = self.cookies_file
-        try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([video_url])
-            self.log_line("✅ Video downloaded successfully.")
-        except Exception as e:
-            self.log_line(f"❌ Error: {e}")
-            self.log_line(traceback.format_exc())
-            if "Unable to extract webpage" in str(e):
-                 self.log_line("💡 HINT: TikTok is blocking the request. Use the 'Select Cookies' button with a cookies.txt file from your browser.")
-                 messagebox.showinfo("Extraction Error", "TikTok refused the connection.\n\nPlease export cookies.txt from your browser and select it in the tool.")
-        finally:
-            self.btn_download.config(state="normal")
-
-    # --- Download full profile ---
-    def _download_profile(self, profile_url: str, count: int | None):
-        self.log_line(f"🔗 Profile: {profile_url}")
-
-        # Correct options for TikTok profiles
-        ydl_opts = {
-            "outtmpl": os.path.join(self.download_folder, "%(uploader)s_%(id)s.%(ext)s"),
-            "merge_output_format": "mp4",
-            "ignoreerrors": True,
-            "continuedl": True,
-            "quiet": True,
-            "no_warnings": True,
-            "progress_hooks": [self._progress_hook],
-            "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-            "extractor_args": {"tiktok": {"impersonate": [""]}}, # Disable internal auto-impersonation to avoid 403
-            # "impersonate": "chrome120",
-        }
-<<<<<<< HEAD
+            options["cookiefile"] = self.cookies_file
+        if video_url:
+            job = DownloadJob(video_url, self.download_folder, single=True, options=options)
+        else:
+            job = DownloadJob(profile_url, self.download_folder, limit=count, options=options)
 
-        try:
-            # Extract videos without flattening
-            with yt_dlp.YoutubeDL({"quiet": True}) as probe:
-=======
-        if self.cookies_file:
-            self.log_line(f"🍪 Using cookies: {os.path.basename(self.cookies_file)}")
-            ydl_opts["cookiefile"] = self.cookies_file
-        if count is not None:
-            ydl_opts["playlistend"] = count
+        # Nothing is running (Download is disabled until it is), so the pool can be resized
+        self.downloads.configure(parallel, per_host)
+        self.downloads.submit(job)
 
-        try:
-            # Count videos first
-            probe_opts = {"quiet": True, "extract_flat": "in_playlist"}
-            if self.cookies_file:
-                probe_opts["cookiefile"] = self.cookies_file
-            with yt_dlp.YoutubeDL(probe_opts) as probe:
->>>>>>> 69d9948aa69aa475f1980d3aa52028002051939a
-                info = probe.extract_info(profile_url, download=False)
-            entries = info.get("entries") or []
-            if count is not None:
-                entries = entries[:count]
-            total = len(entries)
-            if total == 0:
-                self.log_line("⚠️ No videos found.")
-                self.btn_download.config(state="normal")
-                return
 
-            self.progress["maximum"] = total
-            self.progress["value"] = 0
-            self.log_line(f"Found {total} video(s). Starting download…")
-
-            # Download each video individually to respect count
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                for entry in entries:
-                    if self.stop_flag:
-                        break
-                    video_url = entry.get("url")
-                    if video_url:
-                        ydl.download([video_url])
-
-            if not self.stop_flag:
-                self.log_line("✅ All done.")
-        except Exception as e:
-            self.log_line(f"❌ Error: {e}")
-        finally:
-            self.btn_download.config(state="normal")
-
-    def _progress_hook(self, d):
-        if self.stop_flag:
-            return  # stop gracefully
-        if d.get("status") == "finished":
-            self.completed += 1
-            self.lbl_completed.config(text=f"Completed [{self.completed}]")
-            self.progress["value"] = self.completed
-            self.log_line(f"⬇️ Saved: {os.path.basename(d.get('filename',''))}")
-            
+    def _on_event(self, ev: dict):
+        # Failed videos are summed up once the downloads end, not one dialog per video
+        if ev["event"] == "error" and "url" in ev:
+            self.failed.append(ev["error"])
+        elif ev["event"] == "finished" and not self.downloads.running and self.failed:
+            self.lbl_completed.config(text=f"Completed [{self.downloads.completed}]  Failed [{len(self.failed)}]")
+            refused = sum("Unable to extract webpage" in e for e in self.failed)
+            if refused:
+                self.log_line(f"🍪 TikTok refused {refused} video(s). Export cookies.txt from your browser "
+                              "and choose it with Select Cookies, then download again.")
+
 if __name__ == "__main__":
     app = TikTokDownloader()
     app.mainloop()
@@ -1,12 +1,10 @@
 import os
 import re
-import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from tkinter import ttk
-import yt_dlp
-# Import specific yt_dlp error types for better error handling
-from yt_dlp.utils import DownloadError, ExtractorError
+
+from shared_downloader import DownloadJob, TkDownloads
 
 APP_TITLE = "Kimly Tool KH — Video Downloader"
 
@@ -30,8 +28,6 @@ class TikTokDownloader(tk.Tk):
         self.geometry("900x600")
         self.minsize(880, 560)
 
-        self.stop_flag = False
-        self.completed = 0
         self.download_folder = ""
 
         # --- Header ---
@@ -114,6 +110,9 @@ class TikTokDownloader(tk.Tk):
         tk.Label(footer, text="Copyright © 2025 - All rights reserved",
                  fg="white", bg="#0d6efd", font=("Segoe UI", 10)).pack(side="right", padx=16)
 
+        self.downloads = TkDownloads(self, "gemi", self.log_line, progress=self.progress,
+                                     completed=self.lbl_completed, button=self.btn_download)
+
     # --- Helpers ---
     def choose_folder(self):
         folder = filedialog.askdirectory()
@@ -140,12 +139,10 @@ class TikTokDownloader(tk.Tk):
 
     def clear_log(self):
         self.log.delete("1.0", "end")
-        self.completed = 0
-        self.lbl_completed.config(text=f"Completed [{self.completed}]")
-        self.progress["value"] = 0
+        self.downloads.reset()
 
     def stop_download(self):
-        self.stop_flag = True
+        self.downloads.stop()
         self.log_line("⛔ Stopping…")
 
     # --- Main download entry ---
@@ -160,152 +157,37 @@ class TikTokDownloader(tk.Tk):
             messagebox.showerror("Error", "Please choose a download folder.")
             return
 
+        count = 0
+        if not video_url and not self.var_all.get():
+            try:
+                c = int(self.count_entry.get())
+                if c <= 0:
+                    raise ValueError
+                count = c
+            except Exception:
+                messagebox.showerror("Error", "Download count must be a positive number.")
+                return
+
         self.clear_log()
-        self.stop_flag = False
         self.btn_download.config(state="disabled")
 
-        if video_url:
-            # Use the generic single downloader for YouTube, TikTok, or any supported single video URL
-            threading.Thread(target=self._download_single_url, args=(video_url,), daemon=True).start()
-        else:
-            count = None
-            if not self.var_all.get():
-                try:
-                    c = int(self.count_entry.get())
-                    if c <= 0:
-                        raise ValueError
-                    count = c
-                except Exception:
-                    messagebox.showerror("Error", "Download count must be a positive number.")
-                    self.btn_download.config(state="normal")
-                    return
-            threading.Thread(target=self._download_profile, args=(profile_url, count), daemon=True).start()
-
-    # --- Download one video (supports any yt-dlp URL like YouTube, TikTok, etc.) ---
-    def _download_single_url(self, video_url: str):
-        self.log_line(f"🔗 Single URL: {video_url}")
-        self.progress["maximum"] = 1
-        
-        cookie_path = self.cookies_entry.get().strip()
-        
-        ydl_opts = {
-            "outtmpl": os.path.join(self.download_folder, "%(uploader)s_%(id)s.%(ext)s"),
-            "merge_output_format": "mp4",
-            # FIX: Use a more general format selection to resolve "format not available" error on YouTube Shorts
-            "format": "bestvideo+bestaudio/best",
-            "quiet": True,
-            "no_warnings": True,
-            "progress_hooks": [self._progress_hook],
-            "noplaylist": True,
-            # FIX: Add retries to stabilize downloads against 403 errors and network hiccups
-            "retries": 5, 
-            "fragment_retries": 5,
-        }
-        
-        if cookie_path:
-            if not os.path.exists(cookie_path):
-                self.log_line(f"⚠️ Warning: Cookie file not found at {cookie_path}. Proceeding without authentication.")
-            else:
-                ydl_opts["cookiefile"] = cookie_path
-                self.log_line("🔐 Using cookies for authentication...")
-
-        try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([video_url])
-        except (DownloadError, ExtractorError) as e:
-            # Provide more specific error messages for yt-dlp failures
-            self.log_line(f"❌ Download Error: {e.args[0]}")
-            if "403" in str(e):
-                 self.log_line("💡 HINT: Error 403 often means authentication is needed. Try using a valid cookie file.")
-        except Exception as e:
-            self.log_line(f"❌ An unexpected error occurred: {e}")
-        finally:
-            self.btn_download.config(state="normal")
-
-    # --- Download full profile ---
-    def _download_profile(self, profile_url: str, count: int | None):
-        self.log_line(f"🔗 Profile: {profile_url}")
-        
+        options = {"merge_output_format": "mp4"}
         cookie_path = self.cookies_entry.get().strip()
-        
-        ydl_opts = {
-            "outtmpl": os.path.join(self.download_folder, "%(uploader)s_%(id)s.%(ext)s"),
-            "merge_output_format": "mp4",
-            "ignoreerrors": True,
-            "continuedl": True,
-            "quiet": True,
-            "no_warnings": True,
-            "progress_hooks": [self._progress_hook],
-            # FIX: Add retries to stabilize downloads against 403 errors and network hiccups
-            "retries": 5, 
-            "fragment_retries": 5,
-        }
-        
         if cookie_path:
             if not os.path.exists(cookie_path):
                 self.log_line(f"⚠️ Warning: Cookie file not found at {cookie_path}. Proceeding without authentication.")
             else:
-                ydl_opts["cookiefile"] = cookie_path
+                options["cookiefile"] = cookie_path
                 self.log_line("🔐 Using cookies for authentication...")
-            
-        if count is not None:
-            ydl_opts["playlistend"] = count
-
-        try:
-            # Count videos first
-            self.log_line("🔎 Analyzing profile for video count...")
-            # We use a separate YDL instance for probing to avoid interference
-            probe_opts = {"quiet": True, "extract_flat": "in_playlist"}
-            if cookie_path and os.path.exists(cookie_path):
-                 probe_opts["cookiefile"] = cookie_path
-
-            with yt_dlp.YoutubeDL(probe_opts) as probe:
-                info = probe.extract_info(profile_url, download=False)
-                
-            entries = info.get("entries") or []
-            total = len(entries) if count is None else min(len(entries), count)
-            
-            if total == 0:
-                self.log_line("⚠️ No videos found or profile is inaccessible (try using cookies).")
-                self.btn_download.config(state="normal")
-                return
-
-            self.progress["maximum"] = total
-            self.progress["value"] = 0
-            self.log_line(f"Found {total} video(s). Starting download…")
-
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([profile_url])
 
-            if not self.stop_flag:
-                self.log_line("✅ All done.")
-        except (DownloadError, ExtractorError) as e:
-            self.log_line(f"❌ Profile Download Error: {e.args[0]}")
-            if "403" in str(e):
-                 self.log_line("💡 HINT: Error 403 often means authentication is needed. Try using a valid cookie file.")
-        except Exception as e:
-            self.log_line(f"❌ An unexpected error occurred: {e}")
-        finally:
-            self.btn_download.config(state="normal")
-
-    def _progress_hook(self, d):
-        if self.stop_flag:
-            # This is the standard way to stop yt-dlp from a hook
-            raise KeyboardInterrupt("Stopped by user")
-
-        if d.get("status") == "finished":
-            self.completed += 1
-            self.lbl_completed.config(text=f"Completed [{self.completed}]")
-            
-            # For single video download, the maximum is 1, so this will fill the bar
-            self.progress["value"] = self.completed
-            
-            filename = d.get('filename','')
-            # For playlist downloads, filenames often include a playlist index which we strip for a cleaner log
-            if self.progress["maximum"] > 1:
-                filename = re.sub(r'^\d+\-?\d*\s*','', filename)
-                
-            self.log_line(f"⬇️ Saved: {os.path.basename(filename)}")
+        if video_url:
+            # Any single video yt-dlp supports (YouTube, TikTok, etc.)
+            # FIX: Use a more general format selection to resolve "format not available" error on YouTube Shorts
+            options["format"] = "bestvideo+bestaudio/best"
+            job = DownloadJob(video_url, self.download_folder, single=True, options=options)
+        else:
+            job = DownloadJob(profile_url, self.download_folder, limit=count, options=options)
+        self.downloads.submit(job)
 
 if __name__ == "__main__":
     app = TikTokDownloader()
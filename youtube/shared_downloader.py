@@ -0,0 +1,12 @@
+"""The shared download service (../downloader), importable from the tools in this folder.
+
+One identical copy per tool folder; see the end of service.py's docstring for why.
+"""
+import os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "downloader"))
+
+from service import DEFAULT_PER_HOST, DEFAULT_WORKERS, MP3_OPTIONS, DownloadJob
+from tkdownloads import TkDownloads
+
+__all__ = ["DEFAULT_PER_HOST", "DEFAULT_WORKERS", "MP3_OPTIONS", "DownloadJob", "TkDownloads"]
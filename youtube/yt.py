@@ -1,9 +1,8 @@
-import os
-import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from tkinter import ttk
-import yt_dlp
+
+from shared_downloader import MP3_OPTIONS, DownloadJob, TkDownloads
 
 APP_TITLE = "Kimly Tool KH — YouTube Downloader"
 
@@ -14,8 +13,6 @@ class YouTubeDownloader(tk.Tk):
         self.geometry("900x600")
         self.minsize(880, 560)
 
-        self.stop_flag = False
-        self.completed = 0
         self.download_folder = ""
 
         # Header
@@ -81,6 +78,9 @@ class YouTubeDownloader(tk.Tk):
         tk.Label(footer, text="© 2025 All rights reserved",
                  fg="white", bg="#dc3545", font=("Segoe UI", 10)).pack(side="right", padx=16)
 
+        self.downloads = TkDownloads(self, "yt", self.log_line, progress=self.progress,
+                                     completed=self.lbl_completed, button=self.btn_download)
+
     # --- Helpers ---
     def choose_folder(self):
         folder = filedialog.askdirectory()
@@ -94,12 +94,10 @@ class YouTubeDownloader(tk.Tk):
 
     def clear_log(self):
         self.log.delete("1.0", "end")
-        self.completed = 0
-        self.lbl_completed.config(text=f"Completed [{self.completed}]")
-        self.progress["value"] = 0
+        self.downloads.reset()
 
     def stop_download(self):
-        self.stop_flag = True
+        self.downloads.stop()
         self.log_line("⛔ Stopping…")
 
     # --- Start Download ---
@@ -113,16 +111,14 @@ class YouTubeDownloader(tk.Tk):
             return
 
         self.clear_log()
-        self.stop_flag = False
         self.btn_download.config(state="disabled")
+        # A playlist's videos or the one video; the same video may be wanted again as mp3, so no archive
+        self.downloads.submit(DownloadJob(url, self.download_folder, archive=False, outtmpl="%(title)s.%(ext)s",
+                                          options=self._format_options()))
 
-        threading.Thread(target=self._download_video, args=(url,), daemon=True).start()
-
-    # --- Download Logic ---
-    def _download_video(self, url: str):
-        fmt = self.format_var.get()
-        res = self.res_var.get()
-        outtmpl = os.path.join(self.download_folder, "%(title)s.%(ext)s")
+    def _format_options(self) -> dict:
+        if self.format_var.get() == "mp3":
+            return dict(MP3_OPTIONS)
 
         # Quality filter
         res_map = {
@@ -134,57 +130,14 @@ class YouTubeDownloader(tk.Tk):
             "144p": "bestvideo[height<=144]+bestaudio/best",
             "best": "bv*+ba/b"
         }
-        video_format = res_map.get(res, "bv*+ba/b")
-
-        if fmt == "mp3":
-            ydl_opts = {
-                "outtmpl": outtmpl,
-                "format": "bestaudio/best",
-                "postprocessors": [{
-                    "key": "FFmpegExtractAudio",
-                    "preferredcodec": "mp3",
-                    "preferredquality": "192",
-                }],
-                "progress_hooks": [self._progress_hook],
-                "quiet": True,
-                "no_warnings": True,
-            }
-        else:
-            ydl_opts = {
-                "outtmpl": outtmpl,
-                "format": video_format,
-                "merge_output_format": "mp4",
-                "postprocessors": [{
-                    "key": "FFmpegVideoConvertor",
-                    "preferedformat": "mp4",
-                }],
-                "progress_hooks": [self._progress_hook],
-                "quiet": True,
-                "no_warnings": True,
-            }
-
-        try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                total_videos = len(info["entries"]) if "entries" in info else 1
-                self.progress["maximum"] = total_videos
-                ydl.download([url])
-
-            self.log_line("✅ Download complete!")
-        except Exception as e:
-            self.log_line(f"❌ Error: {e}")
-        finally:
-            self.btn_download.config(state="normal")
-
-    def _progress_hook(self, d):
-        if self.stop_flag:
-            raise KeyboardInterrupt("Stopped by user")
-
-        if d.get("status") == "finished":
-            self.completed += 1
-            self.lbl_completed.config(text=f"Completed [{self.completed}]")
-            self.progress["value"] = self.completed
-            self.log_line(f"⬇️ Saved: {os.path.basename(d.get('filename', ''))}")
+        return {
+            "format": res_map.get(self.res_var.get(), "bv*+ba/b"),
+            "merge_output_format": "mp4",
+            "postprocessors": [{
+                "key": "FFmpegVideoConvertor",
+                "preferedformat": "mp4",
+            }],
+        }
 
 if __name__ == "__main__":
     app = YouTubeDownloader()